@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import math
+import operator
+from array import array
+from itertools import islice, repeat
+from typing import Any, Callable, Iterable, Mapping, Sequence
+
+from kinda_orm.evaluation import (
+    BIN_FUNCTIONS, Compiler, UNARY_FUNCTIONS, compose, compose_slices, is_constant, path_segments, path_steps,
+    view_slice,
+)
+from kinda_orm.expr import (
+    AbsExpr, BinExpr, CallExpr, CastExpr, ConstExpr, DivmodExpr, Expr, GetAttrExpr, GetItemExpr, GetSliceExpr,
+    PyFunction, ReverseDivmodExpr, RoundExpr, TruncExpr, UnaryExpr, Variable,
+)
+from kinda_orm.inference import infer_type
+
+
+# Column-at-a-time evaluation: every node becomes a lazy `map` over its
+# operands' streams, so a whole batch is pushed through C-level loops
+# instead of calling a compiled closure tree once per row.
+
+Columns = Mapping[str, Sequence[Any]]
+BatchCompiled = Callable[[Columns], Iterable[Any]]
+
+# Results of these types are packed into typed arrays instead of lists
+_ARRAY_TYPECODES: Mapping[type, str] = {float: "d"}
+
+
+def evaluate_batch(expr: Expr[Any], columns: Columns, *, zero_copy: bool = False) -> Sequence[Any]:
+    return compile_batch(expr, zero_copy=zero_copy)(columns)
+
+
+def compile_batch(expr: Expr[Any], *, zero_copy: bool = False) -> Callable[[Columns], Sequence[Any]]:
+    # NOTE: type inference runs before anything is evaluated, so ill-typed
+    #       expression is rejected up front instead of in the middle of batch
+    result_type = infer_type(expr)
+    stream = _BatchCompiler(zero_copy=zero_copy).compile(expr)
+    typecode = _ARRAY_TYPECODES.get(result_type) if isinstance(result_type, type) else None
+
+    def run(columns: Columns) -> Sequence[Any]:
+        size = min(map(len, columns.values()), default=0)
+        values = islice(stream(columns), size)
+        return array(typecode, values) if typecode is not None else list(values)
+    return run
+
+
+class _BatchCompiler(Compiler):
+    _dispatch = {}
+    _handlers = {}
+
+    def compile_operand(self, value: Any) -> BatchCompiled:
+        if isinstance(value, Expr):
+            return self.compile(value)
+        return _repeated(value)
+
+
+def _repeated(value: Any) -> BatchCompiled:
+    def get(columns: Columns) -> Iterable[Any]:
+        return repeat(value)
+    return get
+
+
+def _mapped(fn: Callable[..., Any], *args: BatchCompiled) -> BatchCompiled:
+    if len(args) == 1:
+        arg, = args
+
+        def apply_unary(columns: Columns) -> Iterable[Any]:
+            return map(fn, arg(columns))
+        return apply_unary
+    if len(args) == 2:
+        left, right = args
+
+        def apply_binary(columns: Columns) -> Iterable[Any]:
+            return map(fn, left(columns), right(columns))
+        return apply_binary
+
+    def apply(columns: Columns) -> Iterable[Any]:
+        return map(fn, *(arg(columns) for arg in args))
+    return apply
+
+
+@_BatchCompiler.register(ConstExpr)
+def _compile_const(compiler: _BatchCompiler, node: ConstExpr[Any]) -> BatchCompiled:
+    return _repeated(node.value)
+
+
+@_BatchCompiler.register(PyFunction)
+def _compile_function(compiler: _BatchCompiler, node: PyFunction[..., Any]) -> BatchCompiled:
+    return _repeated(node.fn)
+
+
+@_BatchCompiler.register(Variable)
+def _compile_variable(compiler: _BatchCompiler, node: Variable[Any]) -> BatchCompiled:
+    name = node.name
+
+    def get(columns: Columns) -> Iterable[Any]:
+        return iter(columns[name])
+    return get
+
+
+@_BatchCompiler.register(CastExpr)
+def _compile_cast(compiler: _BatchCompiler, node: CastExpr[Any]) -> BatchCompiled:
+    return _mapped(node.type, compiler.compile(node.expr))
+
+
+@_BatchCompiler.register(AbsExpr)
+def _compile_abs(compiler: _BatchCompiler, node: AbsExpr[Any]) -> BatchCompiled:
+    return _mapped(abs, compiler.compile(node.arg))
+
+
+@_BatchCompiler.register(TruncExpr)
+def _compile_trunc(compiler: _BatchCompiler, node: TruncExpr[Any]) -> BatchCompiled:
+    return _mapped(math.trunc, compiler.compile(node.arg))
+
+
+@_BatchCompiler.register(RoundExpr)
+def _compile_round(compiler: _BatchCompiler, node: RoundExpr[Any]) -> BatchCompiled:
+    return _mapped(round, compiler.compile(node.arg), _repeated(node.precision))
+
+
+@_BatchCompiler.register(DivmodExpr)
+@_BatchCompiler.register(ReverseDivmodExpr)
+def _compile_divmod(compiler: _BatchCompiler, node: DivmodExpr[Any, Any] | ReverseDivmodExpr[Any, Any]
+                    ) -> BatchCompiled:
+    return _mapped(divmod, compiler.compile(node.left), compiler.compile(node.right))
+
+
+@_BatchCompiler.register(UnaryExpr)
+def _compile_unary(compiler: _BatchCompiler, node: UnaryExpr[Any, Any]) -> BatchCompiled:
+    return _mapped(UNARY_FUNCTIONS[node.operator], compiler.compile(node.arg))
+
+
+@_BatchCompiler.register(BinExpr)
+def _compile_binary(compiler: _BatchCompiler, node: BinExpr[Any, Any, Any]) -> BatchCompiled:
+    return _mapped(BIN_FUNCTIONS[node.operator], compiler.compile(node.left), compiler.compile(node.right))
+
+
+@_BatchCompiler.register(GetItemExpr)
+def _compile_getitem(compiler: _BatchCompiler, node: GetItemExpr[Any, Any]) -> BatchCompiled:
+    if is_constant(node.index):
+        return _compile_path(compiler, node)
+    return _mapped(operator.getitem, compiler.compile(node.sequence), compiler.compile(node.index))
+
+
+@_BatchCompiler.register(GetAttrExpr)
+def _compile_getattr(compiler: _BatchCompiler, node: GetAttrExpr[Any, Any]) -> BatchCompiled:
+    return _compile_path(compiler, node)
+
+
+def _compile_path(compiler: _BatchCompiler, node: GetAttrExpr[Any, Any] | GetItemExpr[Any, Any]) -> BatchCompiled:
+    base, steps = path_steps(node)
+    if base is None:
+        # root variable lookup is a column lookup here, not a per-row step
+        _, name = steps.pop(0)
+        base = Variable(name=name)
+    return _mapped(compose(path_segments(steps)), compiler.compile(base))
+
+
+@_BatchCompiler.register(GetSliceExpr)
+def _compile_getslice(compiler: _BatchCompiler, node: GetSliceExpr[Any]) -> BatchCompiled:
+    if compiler.zero_copy:
+        node = compose_slices(node)
+    sequence = compiler.compile(node.sequence)
+    bounds = node.index.start, node.index.stop, node.index.step
+    if not any(isinstance(bound, Expr) for bound in bounds):
+        if compiler.zero_copy:
+            return _mapped(view_slice, sequence, _repeated(node.index))
+        return _mapped(operator.itemgetter(node.index), sequence)
+    slicer = _view_slice if compiler.zero_copy else _slice
+    return _mapped(slicer, sequence, *map(compiler.compile_operand, bounds))
+
+
+def _slice(sequence: Any, start: Any, stop: Any, step: Any) -> Any:
+    return sequence[start:stop:step]
+
+
+def _view_slice(sequence: Any, start: Any, stop: Any, step: Any) -> Any:
+    return view_slice(sequence, slice(start, stop, step))
+
+
+@_BatchCompiler.register(CallExpr)
+def _compile_call(compiler: _BatchCompiler, node: CallExpr[..., Any]) -> BatchCompiled:
+    fn = compiler.compile(node.fn)
+    args = [compiler.compile_operand(arg) for arg in node.args]
+    names = tuple(node.kwargs)
+    kwargs = [compiler.compile_operand(value) for value in node.kwargs.values()]
+
+    def call(fn: Callable[..., Any], args: tuple[Any, ...], kwvalues: tuple[Any, ...]) -> Any:
+        return fn(*args, **dict(zip(names, kwvalues)))
+
+    def apply(columns: Columns) -> Iterable[Any]:
+        # NOTE: zip() of no streams is empty, so missing args are repeated ()
+        arg_rows = zip(*(arg(columns) for arg in args)) if args else repeat(())
+        kwarg_rows = zip(*(kwarg(columns) for kwarg in kwargs)) if kwargs else repeat(())
+        return map(call, fn(columns), arg_rows, kwarg_rows)
+    return apply
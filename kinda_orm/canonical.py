@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+from dataclasses import fields
+from typing import Any, Hashable, Mapping, TypeVar
+
+from kinda_orm.expr import (
+    AddExpr, AndExpr, BinExpr, ConstExpr, DivmodExpr, EqualExpr, Expr, GreaterOrEqualExpr,
+    GreaterThanExpr, LessOrEqualExpr, LessThanExpr, LShiftExpr, MatmulExpr, ModExpr, MulExpr, NotEqualExpr, OrExpr,
+    PowerExpr, PyFunction, ReverseAddExpr, ReverseAndExpr, ReverseDivmodExpr, ReverseFloordivExpr,
+    ReverseLShiftExpr, ReverseMatmulExpr, ReverseModExpr, ReverseMulExpr, ReverseOrExpr, ReversePowerExpr,
+    ReverseRShiftExpr, ReverseSubExpr, ReverseTruedivExpr, ReverseXorExpr, RShiftExpr, SubExpr, FloordivExpr,
+    TruedivExpr, Variable, XorExpr,
+)
+from kinda_orm.inference import ExprTypeError, TypeCache, infer_type
+from kinda_orm.transform import IdentityMap, Transformer, iter_postorder, transforms
+
+
+T = TypeVar("T")
+
+StructuralKey = tuple[Hashable, ...]
+
+# NOTE: reversed nodes keep operands in source order and evaluate as
+#       `left <op> right`, so forward class with the same operands is
+#       an exact equivalent
+_FORWARD: Mapping[type[Expr[Any]], type[Expr[Any]]] = {
+    ReverseAddExpr: AddExpr,
+    ReverseSubExpr: SubExpr,
+    ReverseMulExpr: MulExpr,
+    ReversePowerExpr: PowerExpr,
+    ReverseMatmulExpr: MatmulExpr,
+    ReverseTruedivExpr: TruedivExpr,
+    ReverseFloordivExpr: FloordivExpr,
+    ReverseModExpr: ModExpr,
+    ReverseAndExpr: AndExpr,
+    ReverseOrExpr: OrExpr,
+    ReverseXorExpr: XorExpr,
+    ReverseLShiftExpr: LShiftExpr,
+    ReverseRShiftExpr: RShiftExpr,
+    ReverseDivmodExpr: DivmodExpr,
+}
+
+_SYMMETRIC: frozenset[type[Expr[Any]]] = frozenset({EqualExpr, NotEqualExpr})
+
+_MIRRORED: Mapping[type[Expr[Any]], type[Expr[Any]]] = {
+    LessThanExpr: GreaterThanExpr,
+    GreaterThanExpr: LessThanExpr,
+    LessOrEqualExpr: GreaterOrEqualExpr,
+    GreaterOrEqualExpr: LessOrEqualExpr,
+}
+
+# `&`, `|` and `^` are associative and commutative only for ints and
+# sets (dict `|` is neither), so chains are reordered only when all of
+# their operands are known to be of the same of these types. bool mixes
+# with int freely, set doesn't mix with frozenset: result takes type of
+# the left operand
+_ASSOCIATIVE: frozenset[type[Expr[Any]]] = frozenset({AndExpr, OrExpr, XorExpr})
+
+_BITWISE_KINDS: Mapping[type, type] = {bool: int, int: int, set: set, frozenset: frozenset}
+
+# `+` and `*` commute only for numbers (not for str, list, etc.), so
+# operands are swapped only when one of them is known to be numeric
+_NUMERIC_COMMUTATIVE: frozenset[type[Expr[Any]]] = frozenset({AddExpr, MulExpr})
+
+_NUMERIC_TYPES = (int, float, complex)
+
+
+def canonicalize(expr: Expr[T]) -> Expr[T]:
+    return _Canonicalizer().transform(expr)
+
+
+def structural_key(expr: Expr[Any]) -> StructuralKey:
+    return _Canonicalizer().key(expr)
+
+
+class _Canonicalizer(Transformer):
+
+    def __init__(self) -> None:
+        self._keys: IdentityMap[StructuralKey] = IdentityMap()
+        self._kinds: IdentityMap[type | None] = IdentityMap()
+        self._types: TypeCache = IdentityMap()
+
+    def key(self, expr: Expr[Any]) -> StructuralKey:
+        # NOTE: keys are built bottom-up, so `_node_key` never recurses deeper
+        #       than one level into already cached children
+        cached = self._keys.get(expr)
+        if cached is not None:
+            return cached
+        for node in iter_postorder(expr, skip=self._keys.__contains__):
+            self._keys[node] = self._node_key(node)
+        return self._keys[expr]
+
+    def _node_key(self, node: Expr[Any]) -> StructuralKey:
+        if isinstance(node, ConstExpr):
+            return ("ConstExpr", type(node.value).__qualname__, repr(node.value))
+        if isinstance(node, Variable):
+            return ("Variable", node.name, repr(node.type))
+        if isinstance(node, PyFunction):
+            return ("PyFunction", getattr(node.fn, "__qualname__", ""), id(node.fn))
+        return (type(node).__qualname__, *(self._value_key(getattr(node, field.name)) for field in fields(node)))
+
+    def _value_key(self, value: Any) -> StructuralKey:
+        if isinstance(value, Expr):
+            return self.key(value)
+        if isinstance(value, slice):
+            return ("slice", *map(self._value_key, (value.start, value.stop, value.step)))
+        if isinstance(value, tuple):
+            return ("tuple", *map(self._value_key, value))
+        if isinstance(value, dict):
+            return ("dict", *((name, self._value_key(item)) for name, item in sorted(value.items())))
+        return (type(value).__qualname__, repr(value))
+
+    def _kind(self, expr: Expr[Any]) -> type | None:
+        for node in iter_postorder(expr, skip=self._kinds.__contains__):
+            self._kinds[node] = self._node_kind(node)
+        return self._kinds[expr]
+
+    def _node_kind(self, node: Expr[Any]) -> type | None:
+        if type(node) in _ASSOCIATIVE:
+            left, right = self._kinds[node.left], self._kinds[node.right]  # type: ignore
+            return left if left is right else None
+        try:
+            return _BITWISE_KINDS.get(infer_type(node, self._types))  # type: ignore
+        except ExprTypeError:
+            return None
+
+    def _sort_key(self, node: Expr[Any]) -> tuple[bool, StructuralKey]:
+        # Constants go last, so `1 + x` and `x + 1` both become `x + 1`
+        return isinstance(node, ConstExpr), self.key(node)
+
+    @transforms(ReverseDivmodExpr)
+    def _forward_divmod(self, node: ReverseDivmodExpr[Any, Any]) -> Expr[Any]:
+        return DivmodExpr(node.left, node.right)
+
+    @transforms(BinExpr)
+    def _reorder(self, node: BinExpr[Any, Any, Any]) -> Expr[Any]:
+        node_type = type(node)
+        forward = _FORWARD.get(node_type)
+        if forward is not None:
+            node = forward(node.left, node.right)  # type: ignore
+            node_type = forward
+
+        kind = self._kind(node) if node_type in _ASSOCIATIVE else None
+        if kind is not None:
+            # Children are canonical already, so a same-typed left child is
+            # a sorted left-deep chain and the rest is inserted into it
+            last = node.left.right if type(node.left) is node_type else node.left  # type: ignore
+            if type(node.right) is not node_type and not self._sort_key(node.right) < self._sort_key(last):
+                return node
+            chain, operands = node.left, self._flatten(node.right, node_type)
+            if type(chain) is not node_type:
+                chain, operands = operands[0], [chain, *operands[1:]]
+            for operand in operands:
+                chain = self._insert(chain, operand, node_type)
+            # NOTE: kind is kept for the new chain, so parent doesn't walk it
+            self._kinds[chain] = kind
+            return chain
+
+        if node_type in _SYMMETRIC or node_type in _MIRRORED or (
+            node_type in _NUMERIC_COMMUTATIVE and (_is_numeric(node.left) or _is_numeric(node.right))
+        ):
+            if self._sort_key(node.right) < self._sort_key(node.left):
+                swapped_type = _MIRRORED.get(node_type, node_type)
+                return swapped_type(node.right, node.left)  # type: ignore
+        return node
+
+    def _flatten(self, node: Expr[Any], node_type: type[Expr[Any]]) -> list[Expr[Any]]:
+        operands: list[Expr[Any]] = []
+        pending = [node]
+        while pending:
+            current = pending.pop()
+            if type(current) is node_type:
+                pending.append(current.right)  # type: ignore
+                pending.append(current.left)  # type: ignore
+            else:
+                operands.append(current)
+        return operands
+
+    def _insert(self, chain: Expr[Any], operand: Expr[Any], node_type: type[Expr[Any]]) -> Expr[Any]:
+        # Walks down the spine only past operands that must follow the new
+        # one; the chain below insertion point is reused as is
+        key = self._sort_key(operand)
+        above: list[Expr[Any]] = []
+        node = chain
+        while type(node) is node_type and key < self._sort_key(node.right):  # type: ignore
+            above.append(node.right)  # type: ignore
+            node = node.left  # type: ignore
+        if type(node) is not node_type and key < self._sort_key(node):
+            result = node_type(operand, node)  # type: ignore
+        else:
+            result = node_type(node, operand)  # type: ignore
+        for right in reversed(above):
+            result = node_type(result, right)  # type: ignore
+        return result
+
+
+def _is_numeric(node: Expr[Any]) -> bool:
+    if isinstance(node, ConstExpr):
+        return isinstance(node.value, _NUMERIC_TYPES)
+    if isinstance(node, Variable):
+        return isinstance(node.type, type) and issubclass(node.type, _NUMERIC_TYPES)
+    return False
@@ -0,0 +1,388 @@
+from __future__ import annotations
+
+import math
+import operator
+from itertools import groupby
+from typing import Any, Callable, Mapping, Sequence, TypeVar
+
+from kinda_orm.expr import (
+    AbsExpr, BinExpr, BinOperator, CallExpr, CastExpr, ConstExpr, DivmodExpr, Expr, GetAttrExpr, GetItemExpr,
+    GetSliceExpr, PyFunction, ReverseDivmodExpr, RoundExpr, TruncExpr, UnaryExpr, UnaryOperator, Variable,
+)
+
+
+T = TypeVar("T")
+
+Scope = Mapping[str, Any]
+Compiled = Callable[[Scope], T]
+
+
+BIN_FUNCTIONS: Mapping[BinOperator, Callable[[Any, Any], Any]] = {
+    BinOperator.add: operator.add,
+    BinOperator.sub: operator.sub,
+    BinOperator.mul: operator.mul,
+    BinOperator.pow: operator.pow,
+    BinOperator.matmul: operator.matmul,
+    BinOperator.truediv: operator.truediv,
+    BinOperator.floordiv: operator.floordiv,
+    BinOperator.mod: operator.mod,
+    BinOperator.and_: operator.and_,
+    BinOperator.or_: operator.or_,
+    BinOperator.xor: operator.xor,
+    BinOperator.lshift: operator.lshift,
+    BinOperator.rshift: operator.rshift,
+    BinOperator.eq: operator.eq,
+    BinOperator.ne: operator.ne,
+    BinOperator.lt: operator.lt,
+    BinOperator.le: operator.le,
+    BinOperator.ge: operator.ge,
+    BinOperator.gt: operator.gt,
+}
+
+UNARY_FUNCTIONS: Mapping[UnaryOperator, Callable[[Any], Any]] = {
+    UnaryOperator.pos: operator.pos,
+    UnaryOperator.neg: operator.neg,
+    UnaryOperator.invert: operator.invert,
+}
+
+
+def evaluate(expr: Expr[T], scope: Scope, *, zero_copy: bool = False) -> T:
+    return compile_expr(expr, zero_copy=zero_copy)(scope)
+
+
+# NOTE: the tree is walked once here, so compiled callable is meant to be
+#       reused across many scopes (rows). With `zero_copy` slices of
+#       buffer-protocol objects (bytes, bytearray, array, mmap) evaluate
+#       to memoryviews instead of copies.
+def compile_expr(expr: Expr[T], *, zero_copy: bool = False) -> Compiled[T]:
+    return Compiler(zero_copy=zero_copy).compile(expr)
+
+
+class Compiler:
+    # NOTE: handlers are looked up by exact node class, falling back to MRO
+    #       on the first miss; the resolved handler is cached per class
+    _dispatch: dict[type, Callable[[Compiler, Any], Compiled[Any]]] = {}
+    _handlers: dict[type, Callable[[Compiler, Any], Compiled[Any]]] = {}
+
+    def __init__(self, *, zero_copy: bool = False) -> None:
+        self.zero_copy = zero_copy
+
+    def compile(self, node: Expr[T]) -> Compiled[T]:
+        node_type = type(node)
+        handler = self._dispatch.get(node_type)
+        if handler is None:
+            handler = self._resolve(node_type)
+        return handler(self, node)
+
+    def compile_operand(self, value: Any) -> Compiled[Any]:
+        if isinstance(value, Expr):
+            return self.compile(value)
+        return _constant(value)
+
+    @classmethod
+    def _resolve(cls, node_type: type) -> Callable[[Compiler, Any], Compiled[Any]]:
+        for base in node_type.__mro__:
+            handler = cls._handlers.get(base)
+            if handler is not None:
+                cls._dispatch[node_type] = handler
+                return handler
+        raise TypeError(f"can't compile expression node of type {node_type.__name__}")
+
+    @classmethod
+    def register(cls, node_type: type) -> Callable[[Callable[[Compiler, Any], Compiled[Any]]],
+                                                   Callable[[Compiler, Any], Compiled[Any]]]:
+        def decorator(handler: Callable[[Compiler, Any], Compiled[Any]]
+                      ) -> Callable[[Compiler, Any], Compiled[Any]]:
+            cls._handlers[node_type] = handler
+            cls._dispatch.clear()
+            return handler
+        return decorator
+
+
+def _constant(value: T) -> Compiled[T]:
+    def get(scope: Scope) -> T:
+        return value
+    return get
+
+
+def _unary(fn: Callable[[Any], Any], arg: Compiled[Any]) -> Compiled[Any]:
+    def apply(scope: Scope) -> Any:
+        return fn(arg(scope))
+    return apply
+
+
+def is_constant(operand: Any) -> bool:
+    return isinstance(operand, ConstExpr) or not isinstance(operand, Expr)
+
+
+def _constant_value(operand: Any) -> Any:
+    return operand.value if isinstance(operand, ConstExpr) else operand
+
+
+def _binary(fn: Callable[[Any, Any], Any], compiler: Compiler, left: Any, right: Any) -> Compiled[Any]:
+    # Constant operands are captured directly to save a call per evaluation
+    if is_constant(right) and not is_constant(left):
+        right_value = _constant_value(right)
+        left_fn = compiler.compile(left)
+
+        def apply_const_right(scope: Scope) -> Any:
+            return fn(left_fn(scope), right_value)
+        return apply_const_right
+    if is_constant(left) and not is_constant(right):
+        left_value = _constant_value(left)
+        right_fn = compiler.compile(right)
+
+        def apply_const_left(scope: Scope) -> Any:
+            return fn(left_value, right_fn(scope))
+        return apply_const_left
+    left_fn = compiler.compile_operand(left)
+    right_fn = compiler.compile_operand(right)
+
+    def apply(scope: Scope) -> Any:
+        return fn(left_fn(scope), right_fn(scope))
+    return apply
+
+
+@Compiler.register(ConstExpr)
+def _compile_const(compiler: Compiler, node: ConstExpr[Any]) -> Compiled[Any]:
+    return _constant(node.value)
+
+
+@Compiler.register(Variable)
+def _compile_variable(compiler: Compiler, node: Variable[Any]) -> Compiled[Any]:
+    return operator.itemgetter(node.name)
+
+
+@Compiler.register(PyFunction)
+def _compile_function(compiler: Compiler, node: PyFunction[..., Any]) -> Compiled[Any]:
+    return _constant(node.fn)
+
+
+@Compiler.register(CastExpr)
+def _compile_cast(compiler: Compiler, node: CastExpr[Any]) -> Compiled[Any]:
+    return _unary(node.type, compiler.compile(node.expr))
+
+
+@Compiler.register(AbsExpr)
+def _compile_abs(compiler: Compiler, node: AbsExpr[Any]) -> Compiled[Any]:
+    return _unary(abs, compiler.compile(node.arg))
+
+
+@Compiler.register(TruncExpr)
+def _compile_trunc(compiler: Compiler, node: TruncExpr[Any]) -> Compiled[Any]:
+    return _unary(math.trunc, compiler.compile(node.arg))
+
+
+@Compiler.register(RoundExpr)
+def _compile_round(compiler: Compiler, node: RoundExpr[Any]) -> Compiled[Any]:
+    arg = compiler.compile(node.arg)
+    precision = node.precision
+
+    def apply(scope: Scope) -> Any:
+        return round(arg(scope), precision)
+    return apply
+
+
+@Compiler.register(DivmodExpr)
+@Compiler.register(ReverseDivmodExpr)
+def _compile_divmod(compiler: Compiler, node: DivmodExpr[Any, Any] | ReverseDivmodExpr[Any, Any]) -> Compiled[Any]:
+    return _binary(divmod, compiler, node.left, node.right)
+
+
+@Compiler.register(UnaryExpr)
+def _compile_unary(compiler: Compiler, node: UnaryExpr[Any, Any]) -> Compiled[Any]:
+    return _unary(UNARY_FUNCTIONS[node.operator], compiler.compile(node.arg))
+
+
+@Compiler.register(BinExpr)
+def _compile_binary(compiler: Compiler, node: BinExpr[Any, Any, Any]) -> Compiled[Any]:
+    # NOTE: reversed nodes keep operands in source order (`1 + x` is
+    #       ReverseAddExpr(1, x)), so they evaluate exactly like forward ones
+    return _binary(BIN_FUNCTIONS[node.operator], compiler, node.left, node.right)
+
+
+@Compiler.register(GetItemExpr)
+def _compile_getitem(compiler: Compiler, node: GetItemExpr[Any, Any]) -> Compiled[Any]:
+    if is_constant(node.index):
+        return _compile_path(compiler, node)
+    return _binary(operator.getitem, compiler, node.sequence, node.index)
+
+
+@Compiler.register(GetSliceExpr)
+def _compile_getslice(compiler: Compiler, node: GetSliceExpr[Any]) -> Compiled[Any]:
+    if compiler.zero_copy:
+        node = compose_slices(node)
+    sequence = compiler.compile(node.sequence)
+    bounds = node.index.start, node.index.stop, node.index.step
+    if not any(isinstance(bound, Expr) for bound in bounds):
+        index = node.index
+        if compiler.zero_copy:
+            def apply_view(scope: Scope) -> Any:
+                return view_slice(sequence(scope), index)
+            return apply_view
+
+        def apply(scope: Scope) -> Any:
+            return sequence(scope)[index]
+        return apply
+    start, stop, step = map(compiler.compile_operand, bounds)
+    if compiler.zero_copy:
+        def apply_dynamic_view(scope: Scope) -> Any:
+            return view_slice(sequence(scope), slice(start(scope), stop(scope), step(scope)))
+        return apply_dynamic_view
+
+    def apply_dynamic(scope: Scope) -> Any:
+        return sequence(scope)[start(scope):stop(scope):step(scope)]
+    return apply_dynamic
+
+
+# Per-type decision whether slicing has to go through memoryview to avoid copy
+_VIEW_SLICING: dict[type, bool] = {}
+
+
+def view_slice(value: Any, index: slice) -> Any:
+    wrap = _VIEW_SLICING.get(type(value))
+    if wrap is None:
+        wrap = _VIEW_SLICING[type(value)] = _needs_view(value)
+    return memoryview(value)[index] if wrap else value[index]
+
+
+def _needs_view(value: Any) -> bool:
+    # memoryview and NumPy-like arrays are sliced into views natively
+    if isinstance(value, memoryview) or hasattr(type(value), "__array_interface__"):
+        return False
+    try:
+        memoryview(value).release()
+    except TypeError:
+        return False
+    return True
+
+
+# `x[a:b][c:d]` is `x[a + c:min(b, a + d)]` when all bounds are non-negative
+# constants and steps are 1, so chained slices are sliced only once
+def compose_slices(node: GetSliceExpr[Any]) -> GetSliceExpr[Any]:
+    while isinstance(node.sequence, GetSliceExpr):
+        index = _compose_slice(node.sequence.index, node.index)
+        if index is None:
+            break
+        node = GetSliceExpr(node.sequence.sequence, index)
+    return node
+
+
+def _compose_slice(inner: slice, outer: slice) -> slice | None:
+    if inner.step not in (None, 1) or outer.step not in (None, 1):
+        return None
+    bounds = inner.start, inner.stop, outer.start, outer.stop
+    if any(bound is not None and (type(bound) is not int or bound < 0) for bound in bounds):
+        return None
+    offset = inner.start or 0
+    start = offset + (outer.start or 0)
+    stops = [stop for stop in (inner.stop, None if outer.stop is None else offset + outer.stop) if stop is not None]
+    return slice(start or None, min(stops) if stops else None)
+
+
+@Compiler.register(GetAttrExpr)
+def _compile_getattr(compiler: Compiler, node: GetAttrExpr[Any, Any]) -> Compiled[Any]:
+    return _compile_path(compiler, node)
+
+
+# Chains like `row.order.customer.address["zip"]` are collapsed into one
+# accessor: runs of attributes become single `attrgetter("a.b.c")` and
+# lookup of the root variable in scope becomes the first item step.
+def _compile_path(compiler: Compiler, node: GetAttrExpr[Any, Any] | GetItemExpr[Any, Any]) -> Compiled[Any]:
+    base, steps = path_steps(node)
+    segments = path_segments(steps)
+    if base is not None:
+        segments.insert(0, compiler.compile(base))
+    return compose(segments)
+
+
+def path_segments(steps: Sequence[tuple[bool, Any]]) -> list[Callable[[Any], Any]]:
+    segments: list[Callable[[Any], Any]] = []
+    for is_attr, group in groupby(steps, key=operator.itemgetter(0)):
+        keys = [key for _, key in group]
+        if not is_attr:
+            segments.append(_items_getter(keys))
+        elif any("." in name for name in keys):
+            # NOTE: attrgetter treats dots as nested lookups, but name here
+            #       is a single attribute which happens to contain a dot
+            segments.extend(
+                (lambda value, name=name: getattr(value, name)) if "." in name else operator.attrgetter(name)
+                for name in keys
+            )
+        else:
+            segments.append(operator.attrgetter(".".join(keys)))
+    return segments
+
+
+def path_steps(node: Expr[Any]) -> tuple[Expr[Any] | None, list[tuple[bool, Any]]]:
+    steps: list[tuple[bool, Any]] = []
+    while True:
+        if isinstance(node, GetAttrExpr):
+            steps.append((True, node.name))
+            node = node.obj
+        elif isinstance(node, GetItemExpr) and is_constant(node.index):
+            steps.append((False, _constant_value(node.index)))
+            node = node.sequence
+        else:
+            break
+    if isinstance(node, Variable):
+        steps.append((False, node.name))
+        base = None
+    else:
+        base = node
+    steps.reverse()
+    return base, steps
+
+
+def _items_getter(keys: Sequence[Any]) -> Callable[[Any], Any]:
+    if len(keys) == 1:
+        return operator.itemgetter(keys[0])
+    if len(keys) == 2:
+        first, second = keys
+
+        def get_pair(value: Any) -> Any:
+            return value[first][second]
+        return get_pair
+
+    def get(value: Any) -> Any:
+        for key in keys:
+            value = value[key]
+        return value
+    return get
+
+
+def compose(fns: Sequence[Callable[[Any], Any]]) -> Callable[[Any], Any]:
+    if len(fns) == 1:
+        return fns[0]
+    if len(fns) == 2:
+        first, second = fns
+
+        def apply_pair(value: Any) -> Any:
+            return second(first(value))
+        return apply_pair
+    if len(fns) == 3:
+        first, second, third = fns
+
+        def apply_triple(value: Any) -> Any:
+            return third(second(first(value)))
+        return apply_triple
+
+    def apply(value: Any) -> Any:
+        for fn in fns:
+            value = fn(value)
+        return value
+    return apply
+
+
+@Compiler.register(CallExpr)
+def _compile_call(compiler: Compiler, node: CallExpr[..., Any]) -> Compiled[Any]:
+    fn = compiler.compile(node.fn)
+    args = tuple(map(compiler.compile_operand, node.args))
+    kwargs = {name: compiler.compile_operand(value) for name, value in node.kwargs.items()}
+
+    def apply(scope: Scope) -> Any:
+        return fn(scope)(
+            *[arg(scope) for arg in args],
+            **{name: kwarg(scope) for name, kwarg in kwargs.items()}
+        )
+    return apply
@@ -21,8 +21,7 @@ from kinda_orm.protocols import (
     SupportsLessThan, SupportsNotEquals
 )
 from kinda_orm.protocols import Indexable, Sliceable
-from kinda_orm.protocols import Lhs, Rhs, Result
-from kinda_orm.protocols import Index, Item
+from kinda_orm.typevars import Index, Item, Lhs, Result, Rhs
 
 
 T = TypeVar("T")
@@ -452,6 +451,16 @@ class TruncExpr(Expr[Result]):
     arg: Expr[SupportsTrunc[Result]]
 
 
+# Operator classes only differ by `operator`, so instead of each one going
+# through @dataclass (which generates and execs the same methods again)
+# they are plain subclasses sharing methods generated for their base
+def _operator_class(cls: type[T]) -> type[T]:
+    # NOTE: same docstring as @dataclass would generate
+    origin = cls.__mro__[1]
+    cls.__doc__ = cls.__name__ + origin.__doc__[len(origin.__name__):]
+    return cls
+
+
 @dataclass
 class UnaryExpr(Expr[Result], Generic[Rhs, Result]):
     arg: Expr[Rhs]
@@ -461,17 +470,17 @@ class UnaryExpr(Expr[Result], Generic[Rhs, Result]):
         return f"{self.operator}{self.arg}"
 
 
-@dataclass
+@_operator_class
 class PosExpr(UnaryExpr[SupportsPos[Result], Result]):
     operator = UnaryOperator.pos
 
 
-@dataclass
+@_operator_class
 class NegExpr(UnaryExpr[SupportsNeg[Result], Result]):
     operator = UnaryOperator.neg
 
 
-@dataclass
+@_operator_class
 class InvertExpr(UnaryExpr[SupportsInvert[Result], Result]):
     operator = UnaryOperator.invert
 
@@ -486,162 +495,162 @@ class BinExpr(Expr[Result], Generic[Lhs, Rhs, Result]):
         return f"{self.left} {self.operator} {self.right}"
 
 
-@dataclass
+@_operator_class
 class AddExpr(BinExpr[SupportsAdd[Rhs, Result], Rhs, Result]):
     operator = BinOperator.add
 
 
-@dataclass
+@_operator_class
 class SubExpr(BinExpr[SupportsSub[Rhs, Result], Rhs, Result]):
     operator = BinOperator.sub
 
 
-@dataclass
+@_operator_class
 class MulExpr(BinExpr[SupportsMul[Rhs, Result], Rhs, Result]):
     operator = BinOperator.mul
 
 
-@dataclass
+@_operator_class
 class PowerExpr(BinExpr[SupportsPower[Rhs, Result], Rhs, Result]):
     operator = BinOperator.pow
 
 
-@dataclass
+@_operator_class
 class MatmulExpr(BinExpr[SupportsMatmul[Rhs, Result], Rhs, Result]):
     operator = BinOperator.matmul
 
 
-@dataclass
+@_operator_class
 class TruedivExpr(BinExpr[SupportsTruediv[Rhs, Result], Rhs, Result]):
     operator = BinOperator.truediv
 
 
-@dataclass
+@_operator_class
 class FloordivExpr(BinExpr[SupportsFloordiv[Rhs, Result], Rhs, Result]):
     operator = BinOperator.floordiv
 
 
-@dataclass
+@_operator_class
 class ModExpr(BinExpr[SupportsMod[Rhs, Result], Rhs, Result]):
     operator = BinOperator.mod
 
 
-@dataclass
+@_operator_class
 class AndExpr(BinExpr[SupportsAnd[Rhs, Result], Rhs, Result]):
     operator = BinOperator.and_
 
 
-@dataclass
+@_operator_class
 class OrExpr(BinExpr[SupportsOr[Rhs, Result], Rhs, Result]):
     operator = BinOperator.or_
 
 
-@dataclass
+@_operator_class
 class XorExpr(BinExpr[SupportsXor[Rhs, Result], Rhs, Result]):
     operator = BinOperator.xor
 
 
-@dataclass
+@_operator_class
 class LShiftExpr(BinExpr[SupportsLShift[Rhs, Result], Rhs, Result]):
     operator = BinOperator.lshift
 
 
-@dataclass
+@_operator_class
 class RShiftExpr(BinExpr[SupportsRShift[Rhs, Result], Rhs, Result]):
     operator = BinOperator.rshift
 
 
-@dataclass
+@_operator_class
 class ReverseAddExpr(BinExpr[Lhs, SupportsReverseAdd[Lhs, Result], Result]):
     operator = BinOperator.add
 
 
-@dataclass
+@_operator_class
 class ReverseSubExpr(BinExpr[Lhs, SupportsReverseSub[Lhs, Result], Result]):
     operator = BinOperator.sub
 
 
-@dataclass
+@_operator_class
 class ReverseMulExpr(BinExpr[Lhs, SupportsReverseMul[Lhs, Result], Result]):
     operator = BinOperator.mul
 
 
-@dataclass
+@_operator_class
 class ReversePowerExpr(BinExpr[Lhs, SupportsReversePower[Lhs, Result], Result]):
     operator = BinOperator.pow
 
 
-@dataclass
+@_operator_class
 class ReverseMatmulExpr(BinExpr[Lhs, SupportsReverseMatmul[Lhs, Result], Result]):
     operator = BinOperator.matmul
 
 
-@dataclass
+@_operator_class
 class ReverseTruedivExpr(BinExpr[Lhs, SupportsReverseTruediv[Lhs, Result], Result]):
     operator = BinOperator.truediv
 
 
-@dataclass
+@_operator_class
 class ReverseFloordivExpr(BinExpr[Lhs, SupportsReverseFloordiv[Lhs, Result], Result]):
     operator = BinOperator.floordiv
 
 
-@dataclass
+@_operator_class
 class ReverseModExpr(BinExpr[Lhs, SupportsReverseMod[Lhs, Result], Result]):
     operator = BinOperator.mod
 
 
-@dataclass
+@_operator_class
 class ReverseAndExpr(BinExpr[Lhs, SupportsReverseAnd[Lhs, Result], Result]):
     operator = BinOperator.and_
 
 
-@dataclass
+@_operator_class
 class ReverseOrExpr(BinExpr[Lhs, SupportsReverseOr[Lhs, Result], Result]):
     operator = BinOperator.or_
 
 
-@dataclass
+@_operator_class
 class ReverseXorExpr(BinExpr[Lhs, SupportsReverseXor[Lhs, Result], Result]):
     operator = BinOperator.xor
 
 
-@dataclass
+@_operator_class
 class ReverseLShiftExpr(BinExpr[Lhs, SupportsReverseLShift[Lhs, Result], Result]):
     operator = BinOperator.lshift
 
 
-@dataclass
+@_operator_class
 class ReverseRShiftExpr(BinExpr[Lhs, SupportsReverseRShift[Lhs, Result], Result]):
     operator = BinOperator.rshift
 
 
-@dataclass
+@_operator_class
 class EqualExpr(BinExpr[SupportsEquals[Rhs, Result], Rhs, Result]):
     operator = BinOperator.eq
 
 
-@dataclass
+@_operator_class
 class NotEqualExpr(BinExpr[SupportsNotEquals[Rhs, Result], Rhs, Result]):
     operator = BinOperator.ne
 
 
-@dataclass
+@_operator_class
 class LessThanExpr(BinExpr[SupportsLessThan[Rhs, Result], Rhs, Result]):
     operator = BinOperator.lt
 
 
-@dataclass
+@_operator_class
 class LessOrEqualExpr(BinExpr[SupportsLessOrEquals[Rhs, Result], Rhs, Result]):
     operator = BinOperator.le
 
 
-@dataclass
+@_operator_class
 class GreaterOrEqualExpr(BinExpr[SupportsGreaterOrEquals[Rhs, Result], Rhs, Result]):
     operator = BinOperator.ge
 
 
-@dataclass
+@_operator_class
 class GreaterThanExpr(BinExpr[SupportsGreaterThan[Rhs, Result], Rhs, Result]):
     operator = BinOperator.gt
 
@@ -665,9 +674,9 @@ class GetSliceExpr(Expr[Item], Generic[Item]):
         if indices == (None, None, None):
             slice_spec: str = ":"
         elif indices[2] is None:
-            slice_spec = ":".join(idc if idc is not None else '' for idc in indices[:2])
+            slice_spec = ":".join(str(idc) if idc is not None else '' for idc in indices[:2])
         else:
-            slice_spec = ":".join(idc if idc is not None else '' for idc in indices)
+            slice_spec = ":".join(str(idc) if idc is not None else '' for idc in indices)
         return f"{self.sequence}[{slice_spec}]"
 
 
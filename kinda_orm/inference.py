@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+from typing import Any, Mapping, NoReturn, get_args, get_origin, get_type_hints
+
+from kinda_orm.expr import (
+    AbsExpr, BinExpr, BinOperator, CallExpr, CastExpr, ConstExpr, DivmodExpr, Expr, GetItemExpr, GetSliceExpr,
+    PyFunction, ReverseDivmodExpr, RoundExpr, TruncExpr, UnaryExpr, UnaryOperator, Variable,
+)
+from kinda_orm.transform import IdentityMap, iter_postorder
+
+
+class ExprTypeError(TypeError):
+    pass
+
+
+# NOTE: only exact builtin types are reasoned about: subclasses may
+#       override operators, so they are treated as unknown
+_NUMERIC_RANKS: Mapping[type, int] = {bool: 0, int: 1, float: 2, complex: 3}
+_RANKED_TYPES = (int, int, float, complex)
+
+_ARITHMETIC = frozenset({
+    BinOperator.add, BinOperator.sub, BinOperator.mul, BinOperator.pow,
+    BinOperator.truediv, BinOperator.floordiv, BinOperator.mod,
+})
+_BITWISE = frozenset({BinOperator.and_, BinOperator.or_, BinOperator.xor, BinOperator.lshift, BinOperator.rshift})
+_ORDERING = frozenset({BinOperator.lt, BinOperator.le, BinOperator.ge, BinOperator.gt})
+_EQUALITY = frozenset({BinOperator.eq, BinOperator.ne})
+_STRINGS = (str, bytes)
+
+
+# NOTE: a cache only lives as long as the caller keeps it
+TypeCache = IdentityMap["type | None"]
+
+
+# Returns `None` when result type can't be known statically. Raises
+# `ExprTypeError` for operations which are bound to fail on any input
+# of known operand types. Passing the same `cache` to calls over one
+# tree makes every node inferred only once.
+def infer_type(expr: Expr[Any], cache: TypeCache | None = None) -> type | None:
+    if cache is None:
+        cache = IdentityMap()
+    for node in iter_postorder(expr, skip=cache.__contains__):
+        cache[node] = _infer_node(node, cache)
+    return cache[expr]
+
+
+def _type_of(value: Any, cache: TypeCache) -> type | None:
+    if isinstance(value, Expr):
+        return cache[value]
+    return type(value)
+
+
+def _infer_node(node: Expr[Any], cache: TypeCache) -> type | None:
+    if isinstance(node, ConstExpr):
+        return type(node.value)
+    if isinstance(node, Variable):
+        return node.type
+    if isinstance(node, CastExpr):
+        return node.type
+    if isinstance(node, CallExpr) and isinstance(node.fn, PyFunction):
+        return _return_type(node.fn.fn)
+    if isinstance(node, BinExpr):
+        return _infer_binary(node, node.operator, _type_of(node.left, cache), _type_of(node.right, cache))
+    if isinstance(node, UnaryExpr):
+        return _infer_unary(node, node.operator, _type_of(node.arg, cache))
+    if isinstance(node, (DivmodExpr, ReverseDivmodExpr)):
+        result = _infer_binary(node, BinOperator.floordiv, _type_of(node.left, cache), _type_of(node.right, cache))
+        return tuple if result is not None else None
+    if isinstance(node, AbsExpr):
+        arg = _type_of(node.arg, cache)
+        if arg is complex:
+            return float
+        return _infer_unary(node, UnaryOperator.pos, arg)
+    if isinstance(node, (RoundExpr, TruncExpr)):
+        arg = _type_of(node.arg, cache)
+        if arg in _NUMERIC_RANKS and arg is not complex:
+            return float if isinstance(node, RoundExpr) and arg is float else int
+        if arg is complex or arg in _STRINGS:
+            raise ExprTypeError(f"type {arg.__name__} doesn't support {type(node).__name__}: {node}")
+        return None
+    if isinstance(node, GetItemExpr):
+        return _infer_item(node, _type_of(node.sequence, cache), _type_of(node.index, cache))
+    if isinstance(node, GetSliceExpr):
+        sequence = _type_of(node.sequence, cache)
+        origin = get_origin(sequence)
+        if origin is list or sequence in (str, bytes, bytearray, list, tuple):
+            return sequence
+        if origin is tuple:
+            return sequence if Ellipsis in get_args(sequence) else tuple
+        return None
+    return None
+
+
+def _infer_binary(node: Expr[Any], operator: BinOperator, left: Any, right: Any) -> type | None:
+    if operator in _EQUALITY:
+        # NOTE: `__eq__` may return anything (e.g. Expr itself builds
+        #       EqualExpr), it's bool for builtin operands only
+        return bool if _is_builtin(left) and _is_builtin(right) else None
+    left_rank = _NUMERIC_RANKS.get(left) if type(left) is type else None
+    right_rank = _NUMERIC_RANKS.get(right) if type(right) is type else None
+    if left_rank is not None and right_rank is not None:
+        rank = max(left_rank, right_rank)
+        if operator in _ORDERING:
+            if rank < 3:
+                return bool
+        elif operator in _BITWISE:
+            if rank < 2:
+                if operator in (BinOperator.lshift, BinOperator.rshift) or rank == 1:
+                    return int
+                return bool
+        elif operator in (BinOperator.floordiv, BinOperator.mod) and rank == 3:
+            pass
+        elif operator is BinOperator.truediv:
+            return complex if rank == 3 else float
+        elif operator is BinOperator.pow:
+            # int ** negative int is float, float ** fractional may be complex
+            return complex if rank == 3 else None
+        elif operator in _ARITHMETIC:
+            return _RANKED_TYPES[rank]
+        _reject(node, operator, left, right)
+    if left in _STRINGS or right in _STRINGS:
+        return _infer_strings(node, operator, left, right, left_rank, right_rank)
+    return None
+
+
+def _infer_strings(node: Expr[Any],
+                   operator: BinOperator,
+                   left: Any,
+                   right: Any,
+                   left_rank: int | None,
+                   right_rank: int | None,
+                   ) -> type | None:
+    known_left = left_rank is not None or left in _STRINGS
+    known_right = right_rank is not None or right in _STRINGS
+    if operator is BinOperator.mod and left in _STRINGS:
+        return left
+    if not (known_left and known_right):
+        return None
+    if operator in (BinOperator.add, *_ORDERING) and left is right:
+        return left if operator is BinOperator.add else bool
+    if operator is BinOperator.mul:
+        if left in _STRINGS and right_rank in (0, 1):
+            return left
+        if right in _STRINGS and left_rank in (0, 1):
+            return right
+    _reject(node, operator, left, right)
+
+
+def _infer_unary(node: Expr[Any], operator: UnaryOperator, arg: Any) -> type | None:
+    rank = _NUMERIC_RANKS.get(arg) if type(arg) is type else None
+    if rank is not None:
+        if operator is UnaryOperator.invert and rank > 1:
+            raise ExprTypeError(f"bad operand type for unary {operator}: {arg.__name__} in {node}")
+        return int if rank == 0 else arg
+    if arg in _STRINGS:
+        raise ExprTypeError(f"bad operand type for unary {operator}: {arg.__name__} in {node}")
+    return None
+
+
+def _infer_item(node: Expr[Any], sequence: Any, index: Any) -> type | None:
+    if sequence in (str, bytes, bytearray):
+        if isinstance(index, type) and index not in (int, bool):
+            raise ExprTypeError(f"{sequence.__name__} indices must be integers, not {index.__name__}: {node}")
+        return str if sequence is str else int
+    origin, args = get_origin(sequence), get_args(sequence)
+    if origin is list and args:
+        return _as_type(args[0])
+    if origin is dict and len(args) == 2:
+        return _as_type(args[1])
+    if origin is tuple and args:
+        if len(args) == 2 and args[1] is Ellipsis:
+            return _as_type(args[0])
+        if isinstance(node.index, ConstExpr) or not isinstance(node.index, Expr):
+            position = node.index.value if isinstance(node.index, ConstExpr) else node.index
+            if isinstance(position, int) and -len(args) <= position < len(args):
+                return _as_type(args[position])
+    return None
+
+
+def _return_type(fn: Any) -> type | None:
+    # Return annotation is trusted same as declared type of a Variable
+    try:
+        hints = get_type_hints(fn)
+    except Exception:
+        return None
+    return _as_type(hints.get("return"))
+
+
+def _is_builtin(value_type: Any) -> bool:
+    origin = get_origin(value_type) or value_type
+    return isinstance(origin, type) and origin.__module__ == "builtins"
+
+
+def _as_type(annotation: Any) -> type | None:
+    return annotation if isinstance(annotation, type) or get_origin(annotation) is not None else None
+
+
+def _reject(node: Expr[Any], operator: BinOperator, left: type, right: type) -> NoReturn:
+    raise ExprTypeError(
+        f"unsupported operand type(s) for {operator}: {left.__name__!r} and {right.__name__!r} in {node}"
+    )
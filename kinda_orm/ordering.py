@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import heapq
+import pickle
+import tempfile
+from itertools import count, islice
+from operator import itemgetter
+from typing import IO, Any, Callable, Iterable, Iterator, Sequence, TypeVar
+
+from kinda_orm.evaluation import Scope, compile_expr
+from kinda_orm.expr import Expr
+
+
+Row = TypeVar("Row", bound=Scope)
+
+DEFAULT_RUN_SIZE = 100_000
+_SPILL_BATCH_SIZE = 1024
+
+
+def order_by(rows: Iterable[Row],
+             key: Expr[Any] | Sequence[Expr[Any]],
+             *,
+             desc: bool | Sequence[bool] = False,
+             limit: int | None = None,
+             run_size: int = DEFAULT_RUN_SIZE,
+             ) -> Iterator[Row]:
+    keys = [key] if isinstance(key, Expr) else list(key)
+    if not keys:
+        raise ValueError("at least one sort key is required")
+    if isinstance(desc, bool):
+        directions = [desc] * len(keys)
+    else:
+        directions = list(desc)
+        if len(directions) != len(keys):
+            raise ValueError(f"got {len(directions)} sort directions for {len(keys)} sort keys")
+    if limit is not None and limit < 0:
+        raise ValueError("limit must be non-negative")
+    if run_size <= 0:
+        raise ValueError("run_size must be positive")
+
+    # NOTE: with mixed directions descending keys are wrapped, so overall
+    #       ordering is always ascending
+    reverse = all(directions)
+    if not reverse and any(directions):
+        key_fn = _make_key(keys, directions)
+    else:
+        key_fn = _make_key(keys, [False] * len(keys))
+
+    if limit is not None:
+        return _top_k(rows, key_fn, limit, reverse)
+    return _external_sort(rows, key_fn, reverse, run_size)
+
+
+class _Descending:
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any) -> None:
+        self.value = value
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _Descending) and self.value == other.value
+
+    def __lt__(self, other: _Descending) -> bool:
+        return other.value < self.value
+
+    def __reduce__(self) -> tuple[type[_Descending], tuple[Any]]:
+        return _Descending, (self.value,)
+
+
+def _make_key(keys: Sequence[Expr[Any]], directions: Sequence[bool]) -> Callable[[Scope], Any]:
+    getters = [compile_expr(key) for key in keys]
+    if len(getters) == 1 and not directions[0]:
+        return getters[0]
+    parts = [
+        (lambda row, getter=getter: _Descending(getter(row))) if descending else getter
+        for getter, descending in zip(getters, directions)
+    ]
+    if len(parts) == 1:
+        return parts[0]
+
+    def multi_key(row: Scope) -> tuple[Any, ...]:
+        return tuple([part(row) for part in parts])
+    return multi_key
+
+
+def _top_k(rows: Iterable[Row], key_fn: Callable[[Scope], Any], limit: int, reverse: bool) -> Iterator[Row]:
+    # heapq keeps a bounded heap of `limit` items and calls key once per row
+    if reverse:
+        return iter(heapq.nlargest(limit, rows, key=key_fn))
+    return iter(heapq.nsmallest(limit, rows, key=key_fn))
+
+
+def _external_sort(rows: Iterable[Row],
+                   key_fn: Callable[[Scope], Any],
+                   reverse: bool,
+                   run_size: int,
+                   ) -> Iterator[Row]:
+    # Rows are decorated as (key, seq, row); seq keeps sort stable and
+    # prevents rows themselves from being compared. For descending order
+    # seq is negated, so equal keys still come out in input order.
+    step = -1 if reverse else 1
+    decorated = ((key_fn(row), seq, row) for seq, row in zip(count(0, step), rows))
+    run = sorted(islice(decorated, run_size), reverse=reverse)
+    if len(run) < run_size:
+        yield from map(itemgetter(2), run)
+        return
+
+    spills: list[IO[bytes]] = []
+    try:
+        while run:
+            spills.append(_spill(run))
+            run = sorted(islice(decorated, run_size), reverse=reverse)
+        merged = heapq.merge(*map(_read_spill, spills), reverse=reverse)
+        yield from map(itemgetter(2), merged)
+    finally:
+        for spill in spills:
+            spill.close()
+
+
+def _spill(run: list[tuple[Any, int, Row]]) -> IO[bytes]:
+    spill = tempfile.TemporaryFile()
+    for start in range(0, len(run), _SPILL_BATCH_SIZE):
+        pickle.dump(run[start:start + _SPILL_BATCH_SIZE], spill, pickle.HIGHEST_PROTOCOL)
+    spill.seek(0)
+    return spill
+
+
+def _read_spill(spill: IO[bytes]) -> Iterator[tuple[Any, int, Any]]:
+    while True:
+        try:
+            batch = pickle.load(spill)
+        except EOFError:
+            return
+        yield from batch
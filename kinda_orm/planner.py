@@ -0,0 +1,439 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, replace
+from enum import StrEnum
+from itertools import compress
+from numbers import Real
+from typing import Any, Callable, Iterator, Mapping, Sequence
+
+from kinda_orm.batch import compile_batch
+from kinda_orm.canonical import canonicalize
+from kinda_orm.evaluation import evaluate
+from kinda_orm.expr import (
+    AndExpr, BinExpr, CallExpr, ConstExpr, EqualExpr, Expr, GreaterOrEqualExpr, GreaterThanExpr, LessOrEqualExpr,
+    LessThanExpr, NotEqualExpr, OrExpr, PyFunction, Variable,
+)
+from kinda_orm.inference import infer_type
+from kinda_orm.statistics import ColumnStatistics, TableStatistics
+from kinda_orm.storage import ColumnFile, ColumnResolver, Table, compile_skip, layout
+from kinda_orm.transform import iter_postorder
+
+
+# Costs are in units of one operator applied to one row by batch evaluator
+DEFAULT_CALL_COST = 50.0
+_OPERATOR_COST = 1.0
+_SCAN_ROW_COST = 0.25
+_FETCH_ROW_COST = 4.0
+_BUILD_ROW_COST = 2.0
+_PROBE_ROW_COST = 1.0
+
+# Selectivities assumed for columns without statistics
+_EQUALITY_SELECTIVITY = 0.005
+_INEQUALITY_SELECTIVITY = 1 / 3
+_RANGE_SELECTIVITY = 0.005
+_SELECTIVITY = 0.5
+
+
+class AccessPath(StrEnum):
+    scan = "scan"
+    index = "index"
+
+
+class JoinSide(StrEnum):
+    left = "left"
+    right = "right"
+
+
+@dataclass(frozen=True)
+class Filter:
+    predicate: Expr[Any]
+    columns: tuple[str, ...]
+    selectivity: float
+    cost: float
+
+    @property
+    def rank(self) -> float:
+        # cheap and selective filters go first
+        return self.cost / (1 - self.selectivity) if self.selectivity < 1 else math.inf
+
+
+# Range of values of one column, `None` bound is unbounded
+@dataclass(frozen=True)
+class ColumnRange:
+    column: str
+    low: Any = None
+    high: Any = None
+    low_inclusive: bool = True
+    high_inclusive: bool = True
+
+    def __str__(self) -> str:
+        if self.low is not None and self.low == self.high:
+            return f"{self.column} == {self.low!r}"
+        low = f"{self.low!r} {'<=' if self.low_inclusive else '<'} " if self.low is not None else ""
+        high = f" {'<=' if self.high_inclusive else '<'} {self.high!r}" if self.high is not None else ""
+        return f"{low}{self.column}{high}"
+
+    @property
+    def is_empty(self) -> bool:
+        if self.low is None or self.high is None:
+            return False
+        return self.low > self.high or (self.low == self.high and not (self.low_inclusive and self.high_inclusive))
+
+    def intersect(self, other: ColumnRange) -> ColumnRange:
+        low, low_inclusive = self.low, self.low_inclusive
+        if other.low is not None and (low is None or other.low > low or other.low == low and not other.low_inclusive):
+            low, low_inclusive = other.low, other.low_inclusive
+        high, high_inclusive = self.high, self.high_inclusive
+        if other.high is not None and (
+            high is None or other.high < high or other.high == high and not other.high_inclusive
+        ):
+            high, high_inclusive = other.high, other.high_inclusive
+        return ColumnRange(self.column, low, high, low_inclusive, high_inclusive)
+
+
+@dataclass(frozen=True)
+class ScanPlan:
+    table: Table
+    predicate: Expr[Any]
+    columns: tuple[str, ...]
+    access: AccessPath
+    index: ColumnRange | None
+    filters: tuple[Filter, ...]
+    rows: int
+    chunk_rows: int
+    chunks: int
+    total_chunks: int
+    scanned_rows: float
+    estimated_rows: float
+    cost: float
+    costs: Mapping[str, float]
+    statistics: TableStatistics | None = None
+    empty: bool = False
+
+    def explain(self) -> str:
+        return "\n".join(self._explain())
+
+    def _explain(self) -> list[str]:
+        access = f"index({self.index.column})" if self.index is not None else str(self.access)
+        lines = [
+            f"Scan {self.table.directory}  access={access}  rows={self.rows}"
+            f"  estimated={self.estimated_rows:.0f}  cost={self.cost:.1f}"
+        ]
+        if self.empty:
+            lines.append("  predicate is always false")
+            return lines
+        if self.index is not None:
+            lines.append(f"  index {self.index}  estimated={self.scanned_rows:.0f}")
+        else:
+            lines.append(f"  chunks {self.chunks}/{self.total_chunks}  rows={self.scanned_rows:.0f}")
+        for filter_ in self.filters:
+            lines.append(
+                f"  filter {filter_.predicate}  selectivity={filter_.selectivity:.4g}  cost={filter_.cost:.1f}"
+            )
+        lines.append("  considered " + ", ".join(f"{name}={cost:.1f}" for name, cost in self.costs.items()))
+        return lines
+
+    def execute(self) -> Iterator[dict[str, Any]]:
+        if self.empty:
+            return
+        table = self.table
+        files = {name: table.column(name) for name in {*self.columns, *_referenced(self.predicate)}}
+        stages = [(compile_batch(filter_.predicate), filter_.columns) for filter_ in self.filters]
+        values = [files[name].values for name in self.columns]
+        for rows in self._candidates(files, stages):
+            for row in rows:
+                yield {name: column[row] for name, column in zip(self.columns, values)}
+
+    def _candidates(self, files: Mapping[str, ColumnFile], stages: list[_Stage]) -> Iterator[Sequence[int]]:
+        if self.index is not None:
+            index = self.index
+            matched = self.table.create_index(index.column).lookup(
+                index.low, index.high, low_inclusive=index.low_inclusive, high_inclusive=index.high_inclusive,
+            )
+            for start in range(0, len(matched), self.chunk_rows):
+                yield _filter(matched[start:start + self.chunk_rows], stages, files)
+            return
+
+        skip = compile_skip(self.predicate, files)
+        for chunk in range(self.total_chunks):
+            if skip(chunk):
+                continue
+            start, stop = chunk * self.chunk_rows, min(self.rows, (chunk + 1) * self.chunk_rows)
+            selected: Sequence[int] = range(start, stop)
+            if stages:
+                # first filter sees every row, so it reads zero-copy slices
+                matches, names = stages[0]
+                selected = list(compress(selected, matches({name: files[name].values[start:stop] for name in names})))
+            yield _filter(selected, stages[1:], files)
+
+
+_Stage = tuple[Callable[[Mapping[str, Sequence[Any]]], Sequence[Any]], tuple[str, ...]]
+
+
+def _filter(rows: Sequence[int], stages: Sequence[_Stage], files: Mapping[str, ColumnFile]) -> Sequence[int]:
+    # later filters only see rows which passed earlier ones
+    for matches, names in stages:
+        if not rows:
+            break
+        columns = {name: list(map(files[name].values.__getitem__, rows)) for name in names}
+        rows = list(compress(rows, matches(columns)))
+    return rows
+
+
+@dataclass(frozen=True)
+class JoinPlan:
+    left: ScanPlan
+    right: ScanPlan
+    left_key: str
+    right_key: str
+    build: JoinSide
+    estimated_rows: float
+    cost: float
+
+    def explain(self) -> str:
+        return "\n".join(self._explain())
+
+    def _explain(self) -> list[str]:
+        return [
+            f"HashJoin {self.left_key} = {self.right_key}  build={self.build}"
+            f"  estimated={self.estimated_rows:.0f}  cost={self.cost:.1f}",
+            *(f"  {line}" for line in self.left._explain()),
+            *(f"  {line}" for line in self.right._explain()),
+        ]
+
+    # Yields `(left_row, right_row)` pairs in order of probe side
+    def execute(self) -> Iterator[tuple[dict[str, Any], dict[str, Any]]]:
+        if self.build is JoinSide.left:
+            build, build_key, probe, probe_key = self.left, self.left_key, self.right, self.right_key
+        else:
+            build, build_key, probe, probe_key = self.right, self.right_key, self.left, self.left_key
+        hashed: dict[Any, list[dict[str, Any]]] = {}
+        for row in build.execute():
+            hashed.setdefault(row[build_key], []).append(row)
+        for row in probe.execute():
+            for match in hashed.get(row[probe_key], ()):
+                yield (match, row) if self.build is JoinSide.left else (row, match)
+
+
+def plan_scan(table: Table,
+              predicate: Expr[Any],
+              columns: Sequence[str] | None = None,
+              *,
+              statistics: TableStatistics | None = None,
+              call_costs: Mapping[Callable[..., Any], float] | None = None,
+              ) -> ScanPlan:
+    # NOTE: predicate is resolved against the table same as in `Table.scan`
+    predicate = canonicalize(ColumnResolver(table).transform(predicate))
+    referenced = sorted(_referenced(predicate))
+    unknown = set(referenced).difference(table.columns)
+    if unknown:
+        raise KeyError(f"unknown columns: {', '.join(sorted(unknown))}")
+    output = tuple(referenced if columns is None else columns)
+    files = {name: table.column(name) for name in {*referenced, *output}}
+    rows, chunk_rows = layout(files) if files else (0, 1)
+    total_chunks = -(-rows // chunk_rows)
+    estimator = _Estimator(statistics, call_costs or {})
+
+    conjuncts = _conjuncts(predicate)
+    if not files or any(not evaluate(conjunct, {}) for conjunct in conjuncts if not _referenced(conjunct)):
+        return ScanPlan(
+            table, predicate, output, AccessPath.scan, None, (), rows, chunk_rows, 0, total_chunks, 0.0, 0.0, 0.0,
+            {AccessPath.scan: 0.0}, statistics, empty=True,
+        )
+    conjuncts = [conjunct for conjunct in conjuncts if _referenced(conjunct)]
+    filters = sorted((estimator.filter(conjunct) for conjunct in conjuncts), key=lambda filter_: filter_.rank)
+    estimated_rows = rows * estimator.conjunction(conjuncts)
+
+    # Zone maps are free, so chunks they skip are known exactly up front
+    skip = compile_skip(predicate, files)
+    chunks = sum(1 for chunk in range(total_chunks) if not skip(chunk))
+    scanned = min(chunks * chunk_rows, rows)
+    plans: dict[str, tuple[float, float, ColumnRange | None, list[Filter]]] = {
+        AccessPath.scan: (scanned * _SCAN_ROW_COST + _filters_cost(filters, scanned, rows), scanned, None, filters),
+    }
+    for column, (column_range, served) in _column_ranges(conjuncts).items():
+        if column not in table.indexes:
+            continue
+        matched = rows * estimator.range(column_range)
+        remaining = [filter_ for filter_ in filters if not any(filter_.predicate is node for node in served)]
+        cost = math.log2(rows + 1) + matched * _FETCH_ROW_COST + _filters_cost(remaining, matched, matched)
+        plans[f"{AccessPath.index}({column})"] = (cost, matched, column_range, remaining)
+
+    name = min(plans, key=lambda name: plans[name][0])
+    cost, scanned_rows, index, filters = plans[name]
+    return ScanPlan(
+        table, predicate, output, AccessPath.index if index is not None else AccessPath.scan, index, tuple(filters),
+        rows, chunk_rows, chunks, total_chunks, scanned_rows, estimated_rows, cost,
+        {name: plan[0] for name, plan in plans.items()}, statistics,
+    )
+
+
+def plan_join(left: ScanPlan, right: ScanPlan, left_key: str, right_key: str) -> JoinPlan:
+    if left_key not in left.columns:
+        left = replace(left, columns=(*left.columns, left_key))
+    if right_key not in right.columns:
+        right = replace(right, columns=(*right.columns, right_key))
+    # NOTE: filters can't leave more distinct keys than rows
+    left_distinct = min(_distinct(left, left_key), left.estimated_rows)
+    right_distinct = min(_distinct(right, right_key), right.estimated_rows)
+    estimated_rows = left.estimated_rows * right.estimated_rows / max(left_distinct, right_distinct, 1.0)
+
+    # smaller input is hashed, so hash table stays small
+    build = JoinSide.left if left.estimated_rows < right.estimated_rows else JoinSide.right
+    build_rows, probe_rows = sorted((left.estimated_rows, right.estimated_rows))
+    cost = left.cost + right.cost + build_rows * _BUILD_ROW_COST + probe_rows * _PROBE_ROW_COST
+    return JoinPlan(left, right, left_key, right_key, build, estimated_rows, cost)
+
+
+def _distinct(plan: ScanPlan, column: str) -> float:
+    stats = plan.statistics.columns.get(column) if plan.statistics is not None else None
+    return stats.distinct if stats is not None else plan.estimated_rows
+
+
+def _filters_cost(filters: Sequence[Filter], scanned: float, rows: int) -> float:
+    # NOTE: selectivities are relative to whole table, while input of the
+    #       first filter may already be narrowed by zone maps or index
+    cost, fraction = 0.0, 1.0
+    for filter_ in filters:
+        cost += min(rows * fraction, scanned) * filter_.cost
+        fraction *= filter_.selectivity
+    return cost
+
+
+class _Estimator:
+
+    def __init__(self, statistics: TableStatistics | None, call_costs: Mapping[Callable[..., Any], float]) -> None:
+        self._statistics = statistics
+        self._call_costs = call_costs
+
+    def _column(self, name: str) -> ColumnStatistics | None:
+        return self._statistics.columns.get(name) if self._statistics is not None else None
+
+    def filter(self, predicate: Expr[Any]) -> Filter:
+        columns = tuple(sorted(_referenced(predicate)))
+        return Filter(predicate, columns, self.selectivity(predicate), self.cost(predicate))
+
+    def cost(self, predicate: Expr[Any]) -> float:
+        cost = 0.0
+        for node in iter_postorder(predicate):
+            if isinstance(node, CallExpr):
+                fn = node.fn.fn if isinstance(node.fn, PyFunction) else None
+                cost += self._call_costs.get(fn, DEFAULT_CALL_COST) if fn is not None else DEFAULT_CALL_COST
+            elif not isinstance(node, (ConstExpr, Variable, PyFunction)):
+                cost += _OPERATOR_COST
+        return cost
+
+    def conjunction(self, conjuncts: Sequence[Expr[Any]]) -> float:
+        # Bounds on the same column make one range, `lo < x` and `x < hi`
+        # select far fewer rows than two independent predicates would
+        ranges = _column_ranges(conjuncts)
+        served = {id(node) for _, nodes in ranges.values() for node in nodes}
+        selectivity = math.prod(self.range(column_range) for column_range, _ in ranges.values())
+        return selectivity * math.prod(self.selectivity(node) for node in conjuncts if id(node) not in served)
+
+    def selectivity(self, node: Expr[Any]) -> float:
+        if isinstance(node, AndExpr) and _is_logical(node):
+            return self.conjunction(_conjuncts(node))
+        if isinstance(node, OrExpr) and _is_logical(node):
+            left, right = self.selectivity(node.left), self.selectivity(node.right)
+            return left + right - left * right
+        if isinstance(node, ConstExpr):
+            return 1.0 if node.value else 0.0
+        column_range = _column_range(node)
+        if column_range is not None:
+            return self.range(column_range)
+        if isinstance(node, (EqualExpr, NotEqualExpr)):
+            equal = self._equal(node.left, node.right)
+            return equal if isinstance(node, EqualExpr) else 1 - equal
+        if isinstance(node, (LessThanExpr, LessOrEqualExpr, GreaterThanExpr, GreaterOrEqualExpr)):
+            return _INEQUALITY_SELECTIVITY
+        return _SELECTIVITY
+
+    def range(self, column_range: ColumnRange) -> float:
+        if column_range.is_empty:
+            return 0.0
+        stats = self._column(column_range.column)
+        if stats is not None:
+            return stats.fraction_between(
+                column_range.low, column_range.high,
+                low_inclusive=column_range.low_inclusive, high_inclusive=column_range.high_inclusive,
+            )
+        if column_range.low is None or column_range.high is None:
+            return _INEQUALITY_SELECTIVITY
+        if column_range.low == column_range.high:
+            return _EQUALITY_SELECTIVITY
+        return _RANGE_SELECTIVITY
+
+    def _equal(self, left: Any, right: Any) -> float:
+        column_range = _column_range(EqualExpr(left, right))
+        if column_range is not None:
+            return self.range(column_range)
+        if isinstance(left, Variable) and isinstance(right, Variable):
+            # NOTE: every value of the column with fewer values is assumed
+            #       to be present in the other one
+            distinct = max(self._distinct(left.name), self._distinct(right.name))
+            if distinct:
+                return 1 / distinct
+        return _EQUALITY_SELECTIVITY
+
+    def _distinct(self, name: str) -> float:
+        stats = self._column(name)
+        return stats.distinct if stats is not None else 0.0
+
+
+def _referenced(predicate: Expr[Any]) -> set[str]:
+    return {node.name for node in iter_postorder(predicate) if isinstance(node, Variable)}
+
+
+def _is_logical(node: BinExpr[Any, Any, Any]) -> bool:
+    # NOTE: `&` and `|` are bitwise, they combine predicates only for bools
+    #       (`True & 2` is 0). Function call is a predicate when annotated
+    #       to return bool or wrapped in `cast(..., bool)`
+    return infer_type(node.left) is bool and infer_type(node.right) is bool
+
+
+def _conjuncts(predicate: Expr[Any]) -> list[Expr[Any]]:
+    conjuncts: list[Expr[Any]] = []
+    pending = [predicate]
+    while pending:
+        node = pending.pop()
+        if isinstance(node, AndExpr) and _is_logical(node):
+            pending.append(node.right)
+            pending.append(node.left)
+        else:
+            conjuncts.append(node)
+    return conjuncts
+
+
+def _column_range(node: Expr[Any]) -> ColumnRange | None:
+    # NOTE: predicate is canonical, so constants are always on the right
+    if not isinstance(node, (EqualExpr, LessThanExpr, LessOrEqualExpr, GreaterThanExpr, GreaterOrEqualExpr)):
+        return None
+    column, value = node.left, node.right
+    if not isinstance(column, Variable) or column.type not in (int, float) or not isinstance(value, ConstExpr):
+        return None
+    value = value.value
+    if not isinstance(value, Real) or value != value:
+        return None
+    if isinstance(node, EqualExpr):
+        return ColumnRange(column.name, value, value)
+    if isinstance(node, (LessThanExpr, LessOrEqualExpr)):
+        return ColumnRange(column.name, high=value, high_inclusive=isinstance(node, LessOrEqualExpr))
+    return ColumnRange(column.name, low=value, low_inclusive=isinstance(node, GreaterOrEqualExpr))
+
+
+def _column_ranges(conjuncts: Sequence[Expr[Any]]) -> dict[str, tuple[ColumnRange, list[Expr[Any]]]]:
+    ranges: dict[str, tuple[ColumnRange, list[Expr[Any]]]] = {}
+    for conjunct in conjuncts:
+        column_range = _column_range(conjunct)
+        if column_range is None:
+            continue
+        if column_range.column in ranges:
+            combined, served = ranges[column_range.column]
+            column_range = combined.intersect(column_range)
+            served.append(conjunct)
+        else:
+            served = [conjunct]
+        ranges[column_range.column] = column_range, served
+    return ranges
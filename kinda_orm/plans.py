@@ -0,0 +1,330 @@
+from __future__ import annotations
+
+import keyword
+import math
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Hashable, TypeVar
+
+from kinda_orm.evaluation import Compiled, Compiler, Scope, view_slice
+from kinda_orm.expr import (
+    AbsExpr, BinExpr, CallExpr, CastExpr, ConstExpr, DivmodExpr, Expr, GetAttrExpr, GetItemExpr, GetSliceExpr,
+    PyFunction, ReverseDivmodExpr, RoundExpr, TruncExpr, UnaryExpr, Variable,
+)
+from kinda_orm.transform import IdentityMap, Transformer, child_fields, iter_postorder, transforms
+
+
+T = TypeVar("T")
+T_co = TypeVar("T_co", covariant=True)
+
+PlanKey = tuple[Hashable, ...]
+
+DEFAULT_MAXSIZE = 256
+
+_LIFTED = "$"
+_NODE = "@"
+
+
+@dataclass
+class PlanCacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    maxsize: int
+
+
+# LRU cache of compiled expressions keyed on their shape. Every constant is
+# lifted out as a positional parameter first, so expressions differing only
+# in literal values share one compiled plan and new values are bound into
+# it at call time.
+class PlanCache:
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE, *, zero_copy: bool = False) -> None:
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.zero_copy = zero_copy
+        self._plans: OrderedDict[PlanKey, Callable[..., Compiled[Any]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = self._misses = self._evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._plans)
+
+    def compile(self, expr: Expr[T]) -> Compiled[T]:
+        key, params = plan_key(expr)
+        with self._lock:
+            make = self._plans.get(key)
+            if make is not None:
+                self._plans.move_to_end(key)
+                self._hits += 1
+                return make(*params)
+            self._misses += 1
+        # NOTE: code is generated outside of lock, concurrent misses on the
+        #       same key just generate the same plan twice
+        template, _ = lift_constants(expr)
+        make = _generate(template, len(params), self.zero_copy)
+        with self._lock:
+            self._plans[key] = make
+            self._plans.move_to_end(key)
+            while len(self._plans) > self.maxsize:
+                self._plans.popitem(last=False)
+                self._evictions += 1
+        return make(*params)
+
+    def evaluate(self, expr: Expr[T], scope: Scope) -> T:
+        return self.compile(expr)(scope)
+
+    def stats(self) -> PlanCacheStats:
+        with self._lock:
+            return PlanCacheStats(self._hits, self._misses, self._evictions, len(self._plans), self.maxsize)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._plans.clear()
+            self._hits = self._misses = self._evictions = 0
+
+
+@dataclass(eq=False)
+class Parameter(Expr[T_co]):
+    index: int
+
+    def __str__(self) -> str:
+        return f"${self.index}"
+
+
+# Shape key of expression with constants lifted out, along with the lifted
+# values. Yields the same parameters in the same order as `lift_constants`,
+# but doesn't build template tree, so cache hits stay cheap.
+#
+# Key is flat: one entry per distinct node in postorder, children refer to
+# entries by position. Nested keys would repeat shared subtrees, which is
+# exponential to hash for DAGs. Lifted values are keyed by their parameter
+# index, so `c + c` over one shared constant and `c1 + c2` don't collide.
+def plan_key(expr: Expr[Any]) -> tuple[PlanKey, list[Any]]:
+    params: list[Any] = []
+    entries: list[Hashable] = []
+    keys: IdentityMap[tuple[str, int]] = IdentityMap()
+
+    def lift(value: Any) -> Hashable:
+        if isinstance(value, Expr):
+            return keys[value]
+        params.append(value)
+        return _LIFTED, len(params) - 1
+
+    def lift_bound(bound: Any) -> Hashable:
+        # NOTE: omitted slice bound isn't a value, it's left in place
+        return None if bound is None else lift(bound)
+
+    for node in iter_postorder(expr, skip=keys.__contains__):
+        node_type = type(node)
+        key: PlanKey
+        if isinstance(node, BinExpr):
+            key = (node_type, keys[node.left], keys[node.right])
+        elif isinstance(node, ConstExpr):
+            params.append(node.value)
+            key = (_LIFTED, len(params) - 1)
+        elif isinstance(node, Variable):
+            key = (node_type, node.name, node.type)
+        elif isinstance(node, GetItemExpr):
+            key = (node_type, keys[node.sequence], lift(node.index))
+        elif isinstance(node, GetSliceExpr):
+            bounds = node.index.start, node.index.stop, node.index.step
+            key = (node_type, keys[node.sequence], *map(lift_bound, bounds))
+        elif isinstance(node, CallExpr):
+            args = tuple(map(lift, node.args))
+            kwargs = tuple((name, lift(value)) for name, value in node.kwargs.items())
+            key = (node_type, keys[node.fn], args, kwargs)
+        else:
+            key = (node_type, *(
+                keys[value] if isinstance(value, Expr) else value
+                for value in map(node.__getattribute__, child_fields(node_type))
+            ))
+        keys[node] = _NODE, len(entries)
+        entries.append(key)
+    return tuple(entries), params
+
+
+def lift_constants(expr: Expr[T]) -> tuple[Expr[T], list[Any]]:
+    lifter = _ConstantLifter()
+    return lifter.transform(expr), lifter.params
+
+
+# Besides ConstExpr nodes, plain values used as operands (item indexes,
+# call arguments, slice bounds) are lifted too. Shared nodes are transformed
+# once, so shared constant becomes one shared `Parameter`.
+class _ConstantLifter(Transformer):
+
+    def __init__(self) -> None:
+        self.params: list[Any] = []
+
+    def _lift(self, value: Any) -> Any:
+        if isinstance(value, Expr):
+            return value
+        self.params.append(value)
+        return Parameter(len(self.params) - 1)
+
+    def _lift_bound(self, bound: Any) -> Any:
+        return None if bound is None else self._lift(bound)
+
+    @transforms(ConstExpr)
+    def _lift_const(self, node: ConstExpr[Any]) -> Expr[Any]:
+        self.params.append(node.value)
+        return Parameter(len(self.params) - 1)
+
+    @transforms(GetItemExpr)
+    def _lift_index(self, node: GetItemExpr[Any, Any]) -> Expr[Any]:
+        if isinstance(node.index, Expr):
+            return node
+        return replace(node, index=self._lift(node.index))
+
+    @transforms(GetSliceExpr)
+    def _lift_bounds(self, node: GetSliceExpr[Any]) -> Expr[Any]:
+        bounds = node.index.start, node.index.stop, node.index.step
+        if all(isinstance(bound, Expr) or bound is None for bound in bounds):
+            return node
+        return replace(node, index=slice(*map(self._lift_bound, bounds)))
+
+    @transforms(CallExpr)
+    def _lift_arguments(self, node: CallExpr[..., Any]) -> Expr[Any]:
+        if all(isinstance(arg, Expr) for arg in (*node.args, *node.kwargs.values())):
+            return node
+        args = tuple(map(self._lift, node.args))
+        kwargs = {name: self._lift(value) for name, value in node.kwargs.items()}
+        return replace(node, args=args, kwargs=kwargs)
+
+
+# Plans are generated as Python source in SSA form: every node is assigned
+# to its own local, so there's no nesting depth limit for deep trees. The
+# source defines a factory taking lifted parameters and returning plan
+# closed over them, so binding new constants is a single function call.
+def _generate(template: Expr[Any], params_count: int, zero_copy: bool) -> Callable[..., Compiled[Any]]:
+    generator = _CodeGenerator(zero_copy=zero_copy)
+    body: list[str] = []
+    for node in iter_postorder(template, skip=generator.names.__contains__):
+        source = generator.compile(node)
+        if isinstance(node, (Variable, Parameter)):
+            generator.names[node] = source
+        else:
+            name = generator.names[node] = f"_t{len(body)}"
+            body.append(f"        {name} = {source}")
+    params = ", ".join(f"_p{index}" for index in range(params_count))
+    source = "\n".join([
+        f"def _make({params}):",
+        "    def _plan(scope):",
+        *body,
+        f"        return {generator.names[template]}",
+        "    return _plan",
+    ])
+    namespace = dict(generator.globals)
+    exec(compile(source, "<kinda_orm plan>", "exec"), namespace)
+    return namespace["_make"]  # type: ignore
+
+
+class _CodeGenerator(Compiler):
+    _dispatch = {}
+    _handlers = {}
+
+    def __init__(self, *, zero_copy: bool = False) -> None:
+        super().__init__(zero_copy=zero_copy)
+        self.names: IdentityMap[str] = IdentityMap()
+        self.globals: dict[str, Any] = {"_trunc": math.trunc, "_view_slice": view_slice}
+
+    def operand(self, value: Any) -> str:
+        if isinstance(value, Expr):
+            return self.names[value]
+        return self.global_(value)
+
+    def global_(self, value: Any) -> str:
+        name = f"_g{len(self.globals)}"
+        self.globals[name] = value
+        return name
+
+
+@_CodeGenerator.register(Parameter)
+def _generate_parameter(generator: _CodeGenerator, node: Parameter[Any]) -> str:
+    return f"_p{node.index}"
+
+
+@_CodeGenerator.register(Variable)
+def _generate_variable(generator: _CodeGenerator, node: Variable[Any]) -> str:
+    return f"scope[{node.name!r}]"
+
+
+@_CodeGenerator.register(PyFunction)
+def _generate_function(generator: _CodeGenerator, node: PyFunction[..., Any]) -> str:
+    return generator.global_(node.fn)
+
+
+@_CodeGenerator.register(CastExpr)
+def _generate_cast(generator: _CodeGenerator, node: CastExpr[Any]) -> str:
+    return f"{generator.global_(node.type)}({generator.operand(node.expr)})"
+
+
+@_CodeGenerator.register(AbsExpr)
+def _generate_abs(generator: _CodeGenerator, node: AbsExpr[Any]) -> str:
+    return f"abs({generator.operand(node.arg)})"
+
+
+@_CodeGenerator.register(TruncExpr)
+def _generate_trunc(generator: _CodeGenerator, node: TruncExpr[Any]) -> str:
+    return f"_trunc({generator.operand(node.arg)})"
+
+
+@_CodeGenerator.register(RoundExpr)
+def _generate_round(generator: _CodeGenerator, node: RoundExpr[Any]) -> str:
+    return f"round({generator.operand(node.arg)}, {generator.global_(node.precision)})"
+
+
+@_CodeGenerator.register(DivmodExpr)
+@_CodeGenerator.register(ReverseDivmodExpr)
+def _generate_divmod(generator: _CodeGenerator, node: DivmodExpr[Any, Any] | ReverseDivmodExpr[Any, Any]) -> str:
+    return f"divmod({generator.operand(node.left)}, {generator.operand(node.right)})"
+
+
+@_CodeGenerator.register(UnaryExpr)
+def _generate_unary(generator: _CodeGenerator, node: UnaryExpr[Any, Any]) -> str:
+    return f"{node.operator}{generator.operand(node.arg)}"
+
+
+@_CodeGenerator.register(BinExpr)
+def _generate_binary(generator: _CodeGenerator, node: BinExpr[Any, Any, Any]) -> str:
+    return f"{generator.operand(node.left)} {node.operator} {generator.operand(node.right)}"
+
+
+@_CodeGenerator.register(GetItemExpr)
+def _generate_getitem(generator: _CodeGenerator, node: GetItemExpr[Any, Any]) -> str:
+    return f"{generator.operand(node.sequence)}[{generator.operand(node.index)}]"
+
+
+@_CodeGenerator.register(GetSliceExpr)
+def _generate_getslice(generator: _CodeGenerator, node: GetSliceExpr[Any]) -> str:
+    sequence = generator.operand(node.sequence)
+    bounds = [
+        "None" if bound is None else generator.operand(bound)
+        for bound in (node.index.start, node.index.stop, node.index.step)
+    ]
+    if generator.zero_copy:
+        return f"_view_slice({sequence}, slice({', '.join(bounds)}))"
+    return f"{sequence}[{':'.join('' if bound == 'None' else bound for bound in bounds)}]"
+
+
+@_CodeGenerator.register(GetAttrExpr)
+def _generate_getattr(generator: _CodeGenerator, node: GetAttrExpr[Any, Any]) -> str:
+    obj = generator.operand(node.obj)
+    if node.name.isidentifier() and not keyword.iskeyword(node.name):
+        return f"{obj}.{node.name}"
+    return f"getattr({obj}, {generator.global_(node.name)})"
+
+
+@_CodeGenerator.register(CallExpr)
+def _generate_call(generator: _CodeGenerator, node: CallExpr[..., Any]) -> str:
+    args = [generator.operand(arg) for arg in node.args]
+    if all(name.isidentifier() and not keyword.iskeyword(name) for name in node.kwargs):
+        args.extend(f"{name}={generator.operand(value)}" for name, value in node.kwargs.items())
+    elif node.kwargs:
+        items = ", ".join(f"{name!r}: {generator.operand(value)}" for name, value in node.kwargs.items())
+        args.append(f"**{{{items}}}")
+    return f"{generator.operand(node.fn)}({', '.join(args)})"
@@ -1,12 +1,6 @@
-from typing import Protocol, TypeVar
+from typing import Protocol
 
-
-Lhs = TypeVar("Lhs", contravariant=True)
-Rhs = TypeVar("Rhs", contravariant=True)
-Result = TypeVar("Result", covariant=True)
-
-Index = TypeVar("Index", contravariant=True)
-Item = TypeVar("Item", covariant=True)
+from kinda_orm.typevars import Index, Item, Lhs, Result, Rhs
 
 
 # Comparisons
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import heapq
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from itertools import repeat
+from numbers import Real
+from typing import Any, Iterable, Mapping, Sequence
+
+from kinda_orm.storage import ColumnFile, Table
+
+
+# Statistics are optional input of the planner (see `kinda_orm.planner`).
+# Row counts and value ranges are exact, distinct counts come from a
+# sketch over every value and histograms are built from a sample.
+
+DEFAULT_BUCKETS = 32
+DEFAULT_SAMPLE_ROWS = 100_000
+DEFAULT_SKETCH_SIZE = 1024
+
+_SKETCH_BATCH = 16384
+
+
+# K minimum values sketch: keeps the `size` smallest distinct hashes seen.
+# Hashes are uniform over the 64-bit range, so the k-th smallest of them
+# tells how densely the range is populated by distinct values.
+class DistinctSketch:
+
+    def __init__(self, size: int = DEFAULT_SKETCH_SIZE) -> None:
+        if size < 2:
+            raise ValueError("size must be at least 2")
+        self.size = size
+        self._hashes: list[int] = []
+
+    def update(self, values: Iterable[Any]) -> None:
+        # NOTE: hashing (value, 0) pairs mixes bits of plain int hashes,
+        #       which are the ints themselves, entirely in C
+        hashes = set(map(hash, zip(values, repeat(0))))
+        hashes.update(self._hashes)
+        self._hashes = heapq.nsmallest(self.size, hashes)
+
+    def estimate(self) -> float:
+        if len(self._hashes) < self.size:
+            return float(len(self._hashes))
+        kth = (self._hashes[-1] + 2 ** 63 + 1) / 2 ** 64
+        return (self.size - 1) / kth
+
+
+# Equi-depth histogram: every bucket between two adjacent bounds holds
+# about the same number of rows. Value spanning several buckets is a
+# frequent one, which is how skew shows up.
+@dataclass(frozen=True)
+class Histogram:
+    bounds: tuple[Any, ...]
+
+    @property
+    def buckets(self) -> int:
+        return max(len(self.bounds) - 1, 0)
+
+    def fraction_below(self, value: Any, equal: float = 0.0) -> float:
+        # `equal` is fraction of rows equal to `value`. When value is upper
+        # bound of a bucket, its rows are in that bucket but not below it
+        if not self.buckets:
+            return 0.0
+        index = bisect_left(self.bounds, value)
+        if index == 0:
+            return 0.0
+        if index == len(self.bounds):
+            return 1.0
+        low, high = self.bounds[index - 1], self.bounds[index]
+        if high == value and not self.fraction_spanned(value):
+            return (index - min(equal * self.buckets, 1.0)) / self.buckets
+        if isinstance(value, Real) and isinstance(low, Real) and isinstance(high, Real) and high > low:
+            position = (value - low) / (high - low)
+        else:
+            position = 0.5
+        return (index - 1 + position) / self.buckets
+
+    def fraction_spanned(self, value: Any) -> float:
+        if not self.buckets:
+            return 0.0
+        spanned = bisect_right(self.bounds, value) - bisect_left(self.bounds, value) - 1
+        return max(spanned, 0) / self.buckets
+
+
+@dataclass(frozen=True)
+class ColumnStatistics:
+    rows: int
+    distinct: float
+    low: Any
+    high: Any
+    histogram: Histogram
+
+    def fraction_equal(self, value: Any) -> float:
+        if self.low is None or not self.low <= value <= self.high:
+            return 0.0
+        return min(max(self.histogram.fraction_spanned(value), 1 / max(self.distinct, 1.0)), 1.0)
+
+    def fraction_below(self, value: Any, *, inclusive: bool = False) -> float:
+        if self.low is None or value < self.low:
+            return 0.0
+        if value > self.high:
+            return 1.0
+        equal = self.fraction_equal(value)
+        fraction = self.histogram.fraction_below(value, equal)
+        if inclusive:
+            fraction += equal
+        return min(fraction, 1.0)
+
+    def fraction_between(self,
+                         low: Any,
+                         high: Any,
+                         *,
+                         low_inclusive: bool = True,
+                         high_inclusive: bool = True,
+                         ) -> float:
+        upper = 1.0 if high is None else self.fraction_below(high, inclusive=high_inclusive)
+        lower = 0.0 if low is None else self.fraction_below(low, inclusive=not low_inclusive)
+        return max(upper - lower, 0.0)
+
+
+@dataclass(frozen=True)
+class TableStatistics:
+    rows: int
+    columns: Mapping[str, ColumnStatistics]
+
+
+def collect_statistics(source: Table | Mapping[str, Sequence[Any]],
+                       columns: Sequence[str] | None = None,
+                       *,
+                       buckets: int = DEFAULT_BUCKETS,
+                       sample_rows: int = DEFAULT_SAMPLE_ROWS,
+                       sketch_size: int = DEFAULT_SKETCH_SIZE,
+                       ) -> TableStatistics:
+    if buckets <= 0 or sample_rows <= 0:
+        raise ValueError("buckets and sample_rows must be positive")
+    names = list((source.columns if isinstance(source, Table) else source) if columns is None else columns)
+    result: dict[str, ColumnStatistics] = {}
+    for name in names:
+        if isinstance(source, Table):
+            column = source.column(name)
+            result[name] = _collect_column(column.values, _file_range(column), buckets, sample_rows, sketch_size)
+        else:
+            result[name] = _collect_column(source[name], None, buckets, sample_rows, sketch_size)
+    rows = {stats.rows for stats in result.values()}
+    if len(rows) > 1:
+        raise ValueError("all columns must have the same length")
+    return TableStatistics(rows.pop() if rows else 0, result)
+
+
+def _collect_column(values: Sequence[Any],
+                    value_range: tuple[Any, Any] | None,
+                    buckets: int,
+                    sample_rows: int,
+                    sketch_size: int,
+                    ) -> ColumnStatistics:
+    rows = len(values)
+    sketch = DistinctSketch(sketch_size)
+    for start in range(0, rows, _SKETCH_BATCH):
+        sketch.update(values[start:start + _SKETCH_BATCH])
+
+    sample = sorted(value for value in values[::max(rows // sample_rows, 1)] if value == value)
+    if value_range is None:
+        value_range = _range(value for value in values if value == value)
+    low, high = value_range
+    if not sample:
+        return ColumnStatistics(rows, sketch.estimate(), low, high, Histogram(()))
+
+    buckets = min(buckets, len(sample))
+    bounds = [sample[round(index * (len(sample) - 1) / buckets)] for index in range(buckets + 1)]
+    # sample may miss extremes, histogram covers the whole range
+    bounds[0], bounds[-1] = low, high
+    return ColumnStatistics(rows, sketch.estimate(), low, high, Histogram(tuple(bounds)))
+
+
+def _file_range(column: ColumnFile) -> tuple[Any, Any]:
+    # chunk stats are exact already, except all-NaN chunks
+    return _range(value for chunk in range(column.chunks) for value in column.chunk_range(chunk) if value == value)
+
+
+def _range(values: Iterable[Any]) -> tuple[Any, Any]:
+    low = high = None
+    for value in values:
+        if low is None or value < low:
+            low = value
+        if high is None or value > high:
+            high = value
+    return low, high
@@ -0,0 +1,331 @@
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import compress
+from typing import Any, Callable, Iterator, Mapping, Sequence
+
+from kinda_orm.batch import compile_batch
+from kinda_orm.canonical import canonicalize
+from kinda_orm.evaluation import evaluate
+from kinda_orm.expr import (
+    AndExpr, BinOperator, ConstExpr, Expr, GetAttrExpr, OrExpr, Variable,
+)
+from kinda_orm.transform import Transformer, iter_postorder, transforms
+
+
+# Column file layout (native byte order, recorded in header):
+#
+#   header     magic, typecode, byte order, row count, rows per chunk
+#   stats      min and max of every chunk, as `2 * chunks` typed values
+#   NaN flags  whether chunk holds NaN, as `chunks` bytes
+#   padding    up to 8-byte boundary
+#   data       raw typed array of all values
+#
+# Chunk is the unit of both scanning and skipping. Default chunk of 8-byte
+# values is 128KiB, so a few referenced columns of a chunk fit in L2 cache.
+
+_MAGIC = b"KORMCOL2"
+_HEADER = struct.Struct("<8scc6xQQ")
+_BYTEORDER = b"<" if sys.byteorder == "little" else b">"
+_FLOAT_TYPECODES = frozenset("fd")
+
+COLUMN_SUFFIX = ".col"
+DEFAULT_CHUNK_ROWS = 16384
+
+
+def write_column(path: str | os.PathLike[str],
+                 values: Sequence[Any],
+                 typecode: str,
+                 *,
+                 chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                 ) -> None:
+    if chunk_rows <= 0:
+        raise ValueError("chunk_rows must be positive")
+    data = values if isinstance(values, array) and values.typecode == typecode else array(typecode, values)
+    stats = array(typecode)
+    nan_flags = bytearray()
+    for start in range(0, len(data), chunk_rows):
+        chunk = data[start:start + chunk_rows]
+        if typecode in _FLOAT_TYPECODES:
+            # NOTE: NaN never satisfies comparison, it's left out of stats
+            #       and recorded by flag, since `!=` holds for it
+            values = [value for value in chunk if value == value]
+            nan_flags.append(len(values) < len(chunk))
+            chunk = values or [float("nan")]
+        else:
+            nan_flags.append(False)
+        stats.append(min(chunk))
+        stats.append(max(chunk))
+    header = _HEADER.pack(_MAGIC, typecode.encode(), _BYTEORDER, len(data), chunk_rows)
+    with open(path, "wb") as file:
+        file.write(header)
+        file.write(stats.tobytes())
+        file.write(nan_flags)
+        file.write(b"\0" * _padding(_HEADER.size + len(stats) * stats.itemsize + len(nan_flags)))
+        data.tofile(file)
+
+
+def write_table(directory: str | os.PathLike[str],
+                columns: Mapping[str, Sequence[Any]],
+                *,
+                typecodes: Mapping[str, str] | None = None,
+                chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                ) -> None:
+    lengths = {len(values) for values in columns.values()}
+    if len(lengths) > 1:
+        raise ValueError("all columns must have the same length")
+    os.makedirs(directory, exist_ok=True)
+    for name, values in columns.items():
+        typecode = (typecodes or {}).get(name) or _guess_typecode(values)
+        write_column(os.path.join(directory, name + COLUMN_SUFFIX), values, typecode, chunk_rows=chunk_rows)
+
+
+class ColumnFile:
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        with open(path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, typecode, byteorder, rows, chunk_rows = _HEADER.unpack_from(self._mmap)
+            if magic != _MAGIC:
+                raise ValueError(f"{os.fspath(path)!r} is not a column file")
+            if byteorder != _BYTEORDER:
+                raise ValueError(f"{os.fspath(path)!r} was written with different byte order")
+            self.typecode: str = typecode.decode()
+            self.rows: int = rows
+            self.chunk_rows: int = chunk_rows
+            itemsize = array(self.typecode).itemsize
+            chunks = -(-rows // chunk_rows)
+            stats_end = _HEADER.size + 2 * chunks * itemsize
+            flags_end = stats_end + chunks
+            data_start = flags_end + _padding(flags_end)
+            view = memoryview(self._mmap)
+            self._stats = view[_HEADER.size:stats_end].cast(self.typecode)
+            self._nan_flags = view[stats_end:flags_end]
+            self.values: memoryview = view[data_start:data_start + rows * itemsize].cast(self.typecode)
+            view.release()
+        except BaseException:
+            self._mmap.close()
+            raise
+
+    @property
+    def chunks(self) -> int:
+        return len(self._stats) // 2
+
+    @property
+    def type(self) -> type:
+        return float if self.typecode in _FLOAT_TYPECODES else int
+
+    def chunk_range(self, chunk: int) -> tuple[Any, Any]:
+        return self._stats[2 * chunk], self._stats[2 * chunk + 1]
+
+    def chunk_has_nan(self, chunk: int) -> bool:
+        return bool(self._nan_flags[chunk])
+
+    def close(self) -> None:
+        # NOTE: slices of `values` handed out (e.g. held by a suspended scan)
+        #       still export the map, then it's unmapped once they are gone
+        for view in (self.values, self._stats, self._nan_flags):
+            try:
+                view.release()
+            except BufferError:
+                pass
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass
+
+
+# In-memory secondary index: row numbers ordered by column value. Range
+# lookup is a pair of binary searches, matching rows come back in table
+# order, so index and scan produce rows in the same order.
+class ColumnIndex:
+
+    def __init__(self, column: ColumnFile) -> None:
+        values = column.values
+        rows: Sequence[int] = range(column.rows)
+        if column.typecode in _FLOAT_TYPECODES:
+            rows = [row for row in rows if values[row] == values[row]]
+        self.rows = array("q", sorted(rows, key=values.__getitem__))
+        self.keys = array(column.typecode, map(values.__getitem__, self.rows))
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def lookup(self,
+               low: Any = None,
+               high: Any = None,
+               *,
+               low_inclusive: bool = True,
+               high_inclusive: bool = True,
+               ) -> array[int]:
+        start = 0 if low is None else (bisect_left if low_inclusive else bisect_right)(self.keys, low)
+        stop = len(self.keys) if high is None else (bisect_right if high_inclusive else bisect_left)(self.keys, high)
+        return array("q", sorted(self.rows[start:stop]))
+
+
+class Table:
+
+    def __init__(self, directory: str | os.PathLike[str]) -> None:
+        self.directory = directory
+        self._files: dict[str, ColumnFile] = {}
+        self._indexes: dict[str, ColumnIndex] = {}
+        self.columns: tuple[str, ...] = tuple(sorted(
+            entry[:-len(COLUMN_SUFFIX)] for entry in os.listdir(directory) if entry.endswith(COLUMN_SUFFIX)
+        ))
+
+    def __enter__(self) -> Table:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._indexes.clear()
+        try:
+            for column in self._files.values():
+                column.close()
+        finally:
+            self._files.clear()
+
+    def column(self, name: str) -> ColumnFile:
+        # columns are mapped lazily, so unreferenced ones are never touched
+        column = self._files.get(name)
+        if column is None:
+            if name not in self.columns:
+                raise KeyError(name)
+            column = self._files[name] = ColumnFile(os.path.join(self.directory, name + COLUMN_SUFFIX))
+        return column
+
+    @property
+    def indexes(self) -> Mapping[str, ColumnIndex]:
+        return self._indexes
+
+    def create_index(self, name: str) -> ColumnIndex:
+        index = self._indexes.get(name)
+        if index is None:
+            index = self._indexes[name] = ColumnIndex(self.column(name))
+        return index
+
+    def scan(self, predicate: Expr[Any], columns: Sequence[str] | None = None) -> Iterator[dict[str, Any]]:
+        predicate = canonicalize(ColumnResolver(self).transform(predicate))
+        referenced = sorted({node.name for node in iter_postorder(predicate) if isinstance(node, Variable)})
+        unknown = set(referenced).difference(self.columns)
+        if unknown:
+            raise KeyError(f"unknown columns: {', '.join(sorted(unknown))}")
+        output = list(referenced if columns is None else columns)
+        files = {name: self.column(name) for name in {*referenced, *output}}
+        if not files:
+            return
+        rows, chunk_rows = layout(files)
+
+        if not referenced:
+            # constant predicate selects either everything or nothing
+            if not evaluate(predicate, {}):
+                return
+            matches: Callable[[Mapping[str, Any]], Any] | None = None
+        else:
+            matches = compile_batch(predicate)
+        skip = compile_skip(predicate, files)
+        for chunk in range(-(-rows // chunk_rows)):
+            if skip(chunk):
+                continue
+            start, stop = chunk * chunk_rows, min(rows, (chunk + 1) * chunk_rows)
+            selected: Iterator[int] = iter(range(start, stop))
+            if matches is not None:
+                chunk_columns = {name: files[name].values[start:stop] for name in referenced}
+                selected = compress(selected, matches(chunk_columns))
+            values = [files[name].values for name in output]
+            for row in selected:
+                yield {name: column[row] for name, column in zip(output, values)}
+
+
+# `row.price` is resolved to column `price` when `row` isn't a column itself
+class ColumnResolver(Transformer):
+
+    def __init__(self, table: Table) -> None:
+        self._table = table
+
+    @transforms(Variable)
+    def _typed_column(self, node: Variable[Any]) -> Expr[Any]:
+        if node.type is None and node.name in self._table.columns:
+            return Variable(name=node.name, type=self._table.column(node.name).type)
+        return node
+
+    @transforms(GetAttrExpr)
+    def _attribute_column(self, node: GetAttrExpr[Any, Any]) -> Expr[Any]:
+        obj = node.obj
+        if isinstance(obj, Variable) and obj.name not in self._table.columns and node.name in self._table.columns:
+            return Variable(name=node.name, type=self._table.column(node.name).type)
+        return node
+
+
+# Given chunk's (min, max) these tell whether `column <op> value` may hold
+# for its values other than NaN
+_MAY_MATCH: Mapping[BinOperator, Callable[[Any, Any, Any], bool]] = {
+    BinOperator.eq: lambda low, high, value: low <= value <= high,
+    BinOperator.ne: lambda low, high, value: not low == high == value,
+    BinOperator.lt: lambda low, high, value: low < value,
+    BinOperator.le: lambda low, high, value: low <= value,
+    BinOperator.gt: lambda low, high, value: high > value,
+    BinOperator.ge: lambda low, high, value: high >= value,
+}
+
+
+def compile_skip(predicate: Expr[Any], files: Mapping[str, ColumnFile]) -> Callable[[int], bool]:
+    if isinstance(predicate, (AndExpr, OrExpr)):
+        left = compile_skip(predicate.left, files)
+        right = compile_skip(predicate.right, files)
+        if isinstance(predicate, AndExpr):
+            return lambda chunk: left(chunk) or right(chunk)
+        return lambda chunk: left(chunk) and right(chunk)
+    operator_ = getattr(type(predicate), "operator", None)
+    may_match = _MAY_MATCH.get(operator_) if isinstance(operator_, BinOperator) else None
+    if may_match is None:
+        return _never
+    column, value = predicate.left, predicate.right  # type: ignore
+    if not isinstance(column, Variable) or not isinstance(value, ConstExpr):
+        return _never
+    chunk_range = files[column.name].chunk_range
+    value = value.value
+    # NOTE: NaN is left out of chunk's (min, max), but `NaN != value` holds
+    has_nan = files[column.name].chunk_has_nan if operator_ is BinOperator.ne else _never
+
+    def skip(chunk: int) -> bool:
+        if has_nan(chunk):
+            return False
+        try:
+            return not may_match(*chunk_range(chunk), value)
+        except TypeError:
+            return False
+    return skip
+
+
+def _never(chunk: int) -> bool:
+    return False
+
+
+def layout(files: Mapping[str, ColumnFile]) -> tuple[int, int]:
+    layouts = {(column.rows, column.chunk_rows) for column in files.values()}
+    if len(layouts) > 1:
+        raise ValueError("columns have different row counts or chunk sizes")
+    return layouts.pop()
+
+
+def _guess_typecode(values: Sequence[Any]) -> str:
+    if isinstance(values, array):
+        return values.typecode
+    if all(isinstance(value, int) for value in values):
+        return "q"
+    if all(isinstance(value, (int, float)) for value in values):
+        return "d"
+    raise TypeError("only int and float columns are supported, pass typecode explicitly for others")
+
+
+def _padding(offset: int) -> int:
+    return -offset % 8
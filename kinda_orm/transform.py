@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+from dataclasses import fields, replace
+from operator import attrgetter
+from typing import Any, Callable, ClassVar, Iterator, Sequence, TypeVar
+
+from kinda_orm.expr import ConstExpr, Expr, PyFunction, Variable
+
+
+T = TypeVar("T")
+V = TypeVar("V")
+Handler = Callable[[Any, Any], Expr[Any]]
+HandlerT = TypeVar("HandlerT", bound=Handler)
+
+_LEAVES = (ConstExpr, Variable, PyFunction)
+
+
+def transforms(*node_types: type[Expr[Any]]) -> Callable[[HandlerT], HandlerT]:
+    def decorator(handler: HandlerT) -> HandlerT:
+        handler._transforms = node_types  # type: ignore
+        return handler
+    return decorator
+
+
+# Bottom-up copy-on-write rewriter of expression trees. Handlers are methods
+# marked with `@transforms(NodeClass, ...)`: each one gets a node with already
+# transformed children and returns either the same node or its replacement.
+# Nodes are copied only when some of their children were replaced, so
+# unchanged subtrees are shared with the source tree by identity.
+class Transformer:
+    _handlers: ClassVar[dict[type, Handler]] = {}
+    _dispatch: ClassVar[dict[type, Handler | None]] = {}
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        handlers = dict(cls._handlers)
+        for attr in vars(cls).values():
+            for node_type in getattr(attr, "_transforms", ()):
+                handlers[node_type] = attr
+        cls._handlers = handlers
+        cls._dispatch = {}
+
+    def transform(self, expr: Expr[T]) -> Expr[T]:
+        # NOTE: shared subtrees are transformed once
+        transformed: IdentityMap[Expr[Any]] = IdentityMap()
+        for node in iter_postorder(expr, skip=transformed.__contains__):
+            new_node = map_children(node, transformed.__getitem__)
+            handler = self._handler(type(new_node))
+            if handler is not None:
+                new_node = handler(self, new_node)
+            transformed[node] = new_node
+        return transformed[expr]
+
+    @classmethod
+    def _handler(cls, node_type: type) -> Handler | None:
+        try:
+            return cls._dispatch[node_type]
+        except KeyError:
+            pass
+        handler = None
+        for base in node_type.__mro__:
+            handler = cls._handlers.get(base)
+            if handler is not None:
+                break
+        cls._dispatch[node_type] = handler
+        return handler
+
+
+# Map keyed by node identity: Expr `==` builds an expression and equal
+# subtrees may still need separate entries. Node is stored alongside its
+# value, so it's kept alive and its id() can't be reused by another node
+# while the map is around. Nodes are owned by the caller and may be mutated
+# (e.g. `variable.type = float`), so nothing is stored on them instead.
+class IdentityMap(dict[int, tuple[Any, V]]):
+    # NOTE: dict methods are called directly, `super()` is slow on hot paths
+
+    def __contains__(self, node: object, _contains: Any = dict.__contains__) -> bool:
+        return _contains(self, id(node))
+
+    def __getitem__(self, node: Any, _getitem: Any = dict.__getitem__) -> V:
+        return _getitem(self, id(node))[1]
+
+    def __setitem__(self, node: Any, value: V, _setitem: Any = dict.__setitem__) -> None:
+        _setitem(self, id(node), (node, value))
+
+    def get(self, node: Any, default: Any = None, _get: Any = dict.get) -> Any:
+        entry = _get(self, id(node))
+        return default if entry is None else entry[1]
+
+
+def iter_postorder(expr: Expr[Any], skip: Callable[[Expr[Any]], bool] | None = None) -> Iterator[Expr[Any]]:
+    # Explicit stack instead of recursion, so deep trees can't overflow it
+    stack: list[tuple[Expr[Any], bool]] = [(expr, False)]
+    pop, push = stack.pop, stack.append
+    while stack:
+        node, expanded = pop()
+        if expanded:
+            yield node
+            continue
+        if skip is not None and skip(node):
+            continue
+        push((node, True))
+        children = _children(node)
+        for index in range(len(children) - 1, -1, -1):
+            push((children[index], False))
+
+
+_FIELD_VALUES: dict[type, Callable[[Any], tuple[Any, ...]]] = {}
+
+
+def _children(node: Expr[Any]) -> Sequence[Expr[Any]]:
+    node_type = type(node)
+    values = _FIELD_VALUES.get(node_type)
+    if values is None:
+        names = () if issubclass(node_type, _LEAVES) else child_fields(node_type)
+        # NOTE: attrgetter with a single name returns value itself, not tuple
+        values = _FIELD_VALUES[node_type] = (
+            attrgetter(*names) if len(names) > 1 else
+            (lambda node, name=names[0]: (getattr(node, name),)) if names else
+            (lambda node: ())
+        )
+    fields_ = values(node)
+    for value in fields_:
+        if not isinstance(value, Expr):
+            return [child for value in fields_ for child in _iter_value(value)]
+    return fields_
+
+
+def map_children(node: Expr[T], fn: Callable[[Expr[Any]], Expr[Any]]) -> Expr[T]:
+    if isinstance(node, _LEAVES):
+        return node
+    changes: dict[str, Any] = {}
+    for name in child_fields(type(node)):
+        value = getattr(node, name)
+        new_value = _map_value(value, fn)
+        if new_value is not value:
+            changes[name] = new_value
+    return replace(node, **changes) if changes else node
+
+
+_CHILD_FIELDS: dict[type, tuple[str, ...]] = {}
+
+
+def child_fields(node_type: type) -> tuple[str, ...]:
+    names = _CHILD_FIELDS.get(node_type)
+    if names is None:
+        names = _CHILD_FIELDS[node_type] = tuple(field.name for field in fields(node_type))
+    return names
+
+
+def _iter_value(value: Any) -> Iterator[Expr[Any]]:
+    if isinstance(value, Expr):
+        yield value
+    elif isinstance(value, slice):
+        for bound in (value.start, value.stop, value.step):
+            yield from _iter_value(bound)
+    elif isinstance(value, tuple):
+        for item in value:
+            yield from _iter_value(item)
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _iter_value(item)
+
+
+def _map_value(value: Any, fn: Callable[[Expr[Any]], Expr[Any]]) -> Any:
+    if isinstance(value, Expr):
+        return fn(value)
+    if isinstance(value, slice):
+        bounds = value.start, value.stop, value.step
+        new_bounds = tuple(_map_value(bound, fn) for bound in bounds)
+        if any(new is not old for new, old in zip(new_bounds, bounds)):
+            return slice(*new_bounds)
+        return value
+    if isinstance(value, tuple):
+        new_items = tuple(_map_value(item, fn) for item in value)
+        return new_items if any(new is not old for new, old in zip(new_items, value)) else value
+    if isinstance(value, dict):
+        new_dict = {name: _map_value(item, fn) for name, item in value.items()}
+        return new_dict if any(new_dict[name] is not item for name, item in value.items()) else value
+    return value
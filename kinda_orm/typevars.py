@@ -0,0 +1,12 @@
+from typing import TypeVar
+
+
+# NOTE: kept apart from `kinda_orm.protocols`, so generic nodes can be
+#       defined without creating protocol classes at runtime
+
+Lhs = TypeVar("Lhs", contravariant=True)
+Rhs = TypeVar("Rhs", contravariant=True)
+Result = TypeVar("Result", covariant=True)
+
+Index = TypeVar("Index", contravariant=True)
+Item = TypeVar("Item", covariant=True)
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from array import array
+
+import pytest
+
+from kinda_orm.batch import compile_batch, evaluate_batch
+from kinda_orm.evaluation import evaluate
+from kinda_orm.expr import ConstExpr, PyFunction, Variable
+from kinda_orm.inference import ExprTypeError
+
+
+def test_matches_row_evaluation() -> None:
+    x, y = Variable(name="x"), Variable(name="y")
+    columns = {"x": [1, 2, 3, 4], "y": [4, 3, 2, 1]}
+    rows = [dict(zip(columns, values)) for values in zip(*columns.values())]
+    for expr in (x + y * 2, (x < y) & (y > 1), divmod(x, y), PyFunction(max)(x, y), -x):
+        assert list(evaluate_batch(expr, columns)) == [evaluate(expr, row) for row in rows]
+
+
+def test_float_result_is_array() -> None:
+    x = Variable(name="x", type=int)
+    result = evaluate_batch(x / 2, {"x": [1, 2, 3]})
+    assert isinstance(result, array) and result.typecode == "d"
+    assert list(result) == [0.5, 1.0, 1.5]
+
+
+def test_shortest_column_and_constants() -> None:
+    x = Variable(name="x")
+    assert evaluate_batch(x + ConstExpr(1), {"x": [1, 2, 3], "y": [0]}) == [2]
+    assert evaluate_batch(ConstExpr(1), {"x": [1, 2]}) == [1, 1]
+
+
+def test_ill_typed_is_rejected_up_front() -> None:
+    with pytest.raises(ExprTypeError):
+        compile_batch(Variable(name="s", type=str) - 1)
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from kinda_orm.canonical import canonicalize, structural_key
+from kinda_orm.evaluation import evaluate
+from kinda_orm.expr import AndExpr, OrExpr, Variable, XorExpr
+
+
+def test_unknown_operands_keep_order() -> None:
+    a, b = Variable(name="a"), Variable(name="b")
+    expr = canonicalize(OrExpr(b, a))
+    assert expr.left is b and expr.right is a
+    scope = {"a": {"key": 1}, "b": {"key": 2}}
+    assert evaluate(expr, scope) == {"key": 1}
+
+
+def test_mixed_sets_keep_order() -> None:
+    s, f = Variable(name="s", type=set), Variable(name="f", type=frozenset)
+    expr = canonicalize(AndExpr(s, f))
+    assert type(evaluate(expr, {"s": {1}, "f": frozenset({1})})) is set
+
+
+def test_known_operands_are_sorted() -> None:
+    a, b, c = Variable(name="a", type=int), Variable(name="b", type=int), Variable(name="c", type=bool)
+    assert str(canonicalize(XorExpr(c, XorExpr(b, a)))) == str(canonicalize(XorExpr(XorExpr(a, c), b)))
+    s, r = Variable(name="s", type=set), Variable(name="r", type=set)
+    assert str(canonicalize(OrExpr(s, r))) == str(canonicalize(OrExpr(r, s)))
+
+
+def test_comparisons_of_unknown_operands_keep_order() -> None:
+    def key(expr: AndExpr) -> tuple:
+        return structural_key(canonicalize(expr))
+
+    a, b = Variable(name="a"), Variable(name="b")
+    for left, right in (((a == 1), (b == 2)), ((a > 1), (b < 2))):
+        assert key(AndExpr(left, right)) != key(AndExpr(right, left))
+    a, b = Variable(name="a", type=int), Variable(name="b", type=float)
+    for left, right in (((a == 1), (b == 2)), ((a > 1), (b < 2)), ((a != 1), (b >= 2))):
+        assert key(AndExpr(left, right)) == key(AndExpr(right, left))
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+from array import array
+from types import SimpleNamespace
+
+import pytest
+
+from kinda_orm.batch import evaluate_batch
+from kinda_orm.evaluation import compile_expr, compose_slices, evaluate, path_segments, path_steps, view_slice
+from kinda_orm.expr import ConstExpr, GetAttrExpr, GetItemExpr, PyFunction, Variable, cast
+from kinda_orm.plans import PlanCache
+
+
+def test_operators() -> None:
+    x, y = Variable(name="x"), Variable(name="y")
+    scope = {"x": 7, "y": 2}
+    assert evaluate(x + y * 3, scope) == 13
+    assert evaluate(10 - x, scope) == 3
+    assert evaluate(2 ** y, scope) == 4
+    assert evaluate(divmod(x, y), scope) == (3, 1)
+    assert evaluate(divmod(20, x), scope) == (2, 6)
+    assert evaluate(-x, scope) == -7
+    assert evaluate(abs(-x), scope) == 7
+    assert evaluate(round(x / y, 0), scope) == 4.0
+    assert evaluate(cast(x, float), scope) == 7.0
+    assert evaluate(ConstExpr(5), {}) == 5
+
+
+def test_call() -> None:
+    x = Variable(name="x")
+    assert evaluate(PyFunction(max)(x, 3), {"x": 1}) == 3
+    assert evaluate(PyFunction(sorted)(x, reverse=True), {"x": [1, 3, 2]}) == [3, 2, 1]
+    with pytest.raises(KeyError):
+        evaluate(x, {})
+
+
+def test_compiled_is_reusable() -> None:
+    x = Variable(name="x")
+    compiled = compile_expr(x * 2 + 1)
+    assert [compiled({"x": value}) for value in range(3)] == [1, 3, 5]
+
+
+def test_path_steps() -> None:
+    row = Variable(name="row")
+    base, steps = path_steps(row.order.customer["zip"])
+    assert base is None
+    assert steps == [(False, "row"), (True, "order"), (True, "customer"), (False, "zip")]
+    call = PyFunction(dict)()
+    base, steps = path_steps(GetItemExpr(call, ConstExpr(0)).real)
+    assert base is call
+    assert steps == [(False, 0), (True, "real")]
+    # NOTE: index computed from the row ends the path
+    dynamic = GetItemExpr(row, Variable(name="key"))
+    assert path_steps(dynamic.real) == (dynamic, [(True, "real")])
+
+
+def test_path_segments_fold_runs() -> None:
+    value = SimpleNamespace(a=SimpleNamespace(b={"c": [10, 20]}))
+    segments = path_segments([(True, "a"), (True, "b"), (False, "c"), (False, 1)])
+    assert len(segments) == 2
+    result = value
+    for segment in segments:
+        result = segment(result)
+    assert result == 20
+
+
+def test_dotted_attribute_name() -> None:
+    row = Variable(name="row")
+    obj = SimpleNamespace(**{"a.b": 1}, a=SimpleNamespace(b=2))
+    expr = GetAttrExpr(GetAttrExpr(row, "a.b"), "real")
+    assert evaluate(expr, {"row": obj}) == 1
+    assert evaluate(row.a.b, {"row": obj}) == 2
+    assert evaluate_batch(expr, {"row": [obj]}) == [1]
+    assert PlanCache().evaluate(expr, {"row": obj}) == 1
+
+
+@pytest.mark.parametrize("inner, outer", [
+    (slice(2, 10), slice(1, 4)),
+    (slice(2, 5), slice(1, 10)),
+    (slice(None, 6), slice(2, None)),
+    (slice(3, None), slice(None, 2)),
+    (slice(None, None), slice(None, None)),
+    (slice(0, 8, 1), slice(None, 3, None)),
+])
+def test_compose_slice(inner: slice, outer: slice) -> None:
+    data = list(range(12))
+    node = compose_slices(Variable(name="x")[inner][outer])
+    assert isinstance(node.sequence, Variable)
+    assert data[node.index] == data[inner][outer]
+
+
+@pytest.mark.parametrize("inner, outer", [
+    (slice(None, None, 2), slice(1, 3)),
+    (slice(-3, None), slice(1, 2)),
+    (slice(1, 5), slice(None, -1)),
+    (slice(1, 5), slice(Variable(name="i"), None)),
+])
+def test_compose_slice_gives_up(inner: slice, outer: slice) -> None:
+    expr = Variable(name="x")[inner][outer]
+    assert compose_slices(expr) is expr
+
+
+def test_view_slice() -> None:
+    data = bytearray(b"abcdef")
+    view = view_slice(data, slice(1, 4))
+    assert isinstance(view, memoryview) and view.tobytes() == b"bcd"
+    data[1] = ord("B")
+    assert view.tobytes() == b"Bcd"
+    view.release()
+    assert view_slice([1, 2, 3], slice(1, None)) == [2, 3]
+    assert view_slice("abc", slice(1, None)) == "bc"
+    assert isinstance(view_slice(memoryview(b"abc"), slice(1, None)), memoryview)
+
+
+def test_zero_copy_chained_slices() -> None:
+    x = Variable(name="x")
+    expr = x[2:10][1:4]
+    assert isinstance(compose_slices(expr).sequence, Variable)
+    data = array("q", range(12))
+    result = evaluate(expr, {"x": data}, zero_copy=True)
+    assert isinstance(result, memoryview) and result.tolist() == [3, 4, 5]
+    assert evaluate(expr, {"x": data}) == array("q", [3, 4, 5])
+    assert list(evaluate_batch(expr, {"x": [data]}, zero_copy=True)[0]) == [3, 4, 5]
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import pickle
+from dataclasses import fields, replace
+from typing import get_type_hints
+
+from kinda_orm.canonical import structural_key
+from kinda_orm.expr import (
+    AbsExpr, AddExpr, BinExpr, ConstExpr, DivmodExpr, EqualExpr, Expr, GetItemExpr, NegExpr, ReverseSubExpr,
+    UnaryExpr, Variable,
+)
+from kinda_orm.protocols import Indexable, SupportsAbs, SupportsAdd, SupportsDivmod, SupportsReverseSub
+from kinda_orm.typevars import Index, Item, Lhs, Result, Rhs
+
+
+def test_operator_classes_are_dataclasses() -> None:
+    x, one = Variable(name="x"), ConstExpr(1)
+    node = AddExpr(x, one)
+    assert [field.name for field in fields(AddExpr)] == ["left", "right"]
+    assert [field.name for field in fields(NegExpr)] == ["arg"]
+    assert repr(node) == f"AddExpr(left={x!r}, right=ConstExpr(value=1))"
+    assert str(node) == f"{x} + 1"
+    # NOTE: dataclass == compares fields, while == of leaves builds EqualExpr
+    assert (node == AddExpr(x, one)) is True
+    assert (node == ReverseSubExpr(x, one)) is False
+    assert isinstance(one == ConstExpr(1), EqualExpr)
+    assert structural_key(replace(node, right=x)) == structural_key(AddExpr(x, x))
+    assert structural_key(pickle.loads(pickle.dumps(node))) == structural_key(node)
+    assert AddExpr.__doc__ == "AddExpr" + BinExpr.__doc__[len("BinExpr"):]
+    assert NegExpr.__doc__ == "NegExpr" + UnaryExpr.__doc__[len("UnaryExpr"):]
+    match node:
+        case AddExpr(left, ConstExpr(1)):
+            assert left is x
+        case _:
+            raise AssertionError(node)
+
+
+def test_operator_classes_keep_protocol_bases() -> None:
+    assert AddExpr.__orig_bases__ == (BinExpr[SupportsAdd[Rhs, Result], Rhs, Result],)
+    assert ReverseSubExpr.__orig_bases__ == (BinExpr[Lhs, SupportsReverseSub[Lhs, Result], Result],)
+    assert AddExpr.__parameters__ == (Rhs, Result)
+
+
+def test_type_hints_resolve() -> None:
+    assert get_type_hints(AbsExpr) == {"arg": Expr[SupportsAbs[Result]]}
+    assert get_type_hints(DivmodExpr) == {"left": Expr[SupportsDivmod[Rhs, Result]], "right": Expr[Rhs]}
+    assert get_type_hints(GetItemExpr) == {"sequence": Expr[Indexable[Index, Item]], "index": Expr[Index] | Index}
+    assert get_type_hints(EqualExpr)["left"] == Expr[Lhs]
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import pytest
+
+from kinda_orm.expr import ConstExpr, GetItemExpr, PyFunction, Variable, cast
+from kinda_orm.inference import ExprTypeError, infer_type
+
+
+def _flag(value: int) -> bool:
+    return bool(value)
+
+
+def test_numeric_promotion() -> None:
+    b, i, f, c = (Variable(name=name, type=type_) for name, type_ in
+                  (("b", bool), ("i", int), ("f", float), ("c", complex)))
+    assert infer_type(b + b) is int
+    assert infer_type(i + f) is float
+    assert infer_type(f * c) is complex
+    assert infer_type(i / i) is float
+    assert infer_type(i ** i) is None
+    assert infer_type(b & b) is bool
+    assert infer_type(b & i) is int
+    assert infer_type(i < f) is bool
+    assert infer_type(-b) is int
+    assert infer_type(abs(c)) is float
+    assert infer_type(round(f, 1)) is float
+    assert infer_type(divmod(i, f)) is tuple
+
+
+@pytest.mark.parametrize("build", [
+    lambda f, c, s: f & f,
+    lambda f, c, s: f << ConstExpr(1),
+    lambda f, c, s: c < c,
+    lambda f, c, s: c // c,
+    lambda f, c, s: ~f,
+    lambda f, c, s: -s,
+    lambda f, c, s: s + f,
+    lambda f, c, s: s - s,
+    lambda f, c, s: s * f,
+    lambda f, c, s: round(c, 0),
+    lambda f, c, s: GetItemExpr(s, f),
+])
+def test_rejected(build) -> None:
+    f, c, s = Variable(name="f", type=float), Variable(name="c", type=complex), Variable(name="s", type=str)
+    with pytest.raises(ExprTypeError):
+        infer_type(build(f, c, s))
+
+
+def test_strings() -> None:
+    s, i = Variable(name="s", type=str), Variable(name="i", type=int)
+    assert infer_type(s + s) is str
+    assert infer_type(s * i) is str
+    assert infer_type(i * s) is str
+    assert infer_type(s < s) is bool
+    assert infer_type(s % Variable(name="args")) is str
+    assert infer_type(s[i]) is str
+    assert infer_type(s[1:]) is str
+    assert infer_type(Variable(name="b", type=bytes)[i]) is int
+
+
+def test_unknown_and_declared_types() -> None:
+    x, i = Variable(name="x"), Variable(name="i", type=int)
+    assert infer_type(x + i) is None
+    assert infer_type(Variable(name="l", type=list[float])[i]) is float
+    assert infer_type(Variable(name="t", type=tuple[int, str])[1]) is str
+    assert infer_type(cast(x, int)) is int
+    assert infer_type(PyFunction(_flag)(i)) is bool
+    assert infer_type(PyFunction(len)(x)) is None
+
+
+def test_type_change_is_seen() -> None:
+    x = Variable(name="x", type=int)
+    expr = x + 1
+    assert infer_type(expr) is int
+    x.type = float
+    assert infer_type(expr) is float
+
+
+def test_equality() -> None:
+    x, i, s = Variable(name="x"), Variable(name="i", type=int), Variable(name="s", type=str)
+    assert infer_type(i == 1) is bool
+    assert infer_type(s != i) is bool
+    assert infer_type(Variable(name="l", type=list[int]) == ConstExpr(None)) is bool
+    assert infer_type(x == 1) is None
+    assert infer_type(x != i) is None
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from kinda_orm.expr import Variable
+from kinda_orm.ordering import order_by
+
+
+def _rows(count: int) -> list[dict[str, int]]:
+    shuffle = random.Random(0)
+    return [{"a": shuffle.randrange(10), "b": shuffle.randrange(10), "seq": seq} for seq in range(count)]
+
+
+@pytest.mark.parametrize("run_size", [1000, 7])
+def test_sort_is_stable(run_size: int) -> None:
+    rows = _rows(100)
+    a = Variable(name="a")
+    assert list(order_by(rows, a, run_size=run_size)) == sorted(rows, key=lambda row: row["a"])
+    # NOTE: equal keys keep input order in descending sort too
+    expected = sorted(rows, key=lambda row: row["a"], reverse=True)
+    assert list(order_by(rows, a, desc=True, run_size=run_size)) == expected
+
+
+@pytest.mark.parametrize("run_size", [1000, 7])
+def test_mixed_directions(run_size: int) -> None:
+    rows = _rows(100)
+    ordered = list(order_by(rows, [Variable(name="a"), Variable(name="b")], desc=[False, True], run_size=run_size))
+    assert ordered == sorted(rows, key=lambda row: (row["a"], -row["b"]))
+
+
+def test_limit() -> None:
+    rows = _rows(100)
+    a, b = Variable(name="a"), Variable(name="b")
+    assert list(order_by(rows, a, limit=5)) == sorted(rows, key=lambda row: row["a"])[:5]
+    assert list(order_by(rows, [a, b], desc=[True, False], limit=5)) == sorted(
+        rows, key=lambda row: (-row["a"], row["b"]),
+    )[:5]
+    assert list(order_by(rows, a, limit=0)) == []
+
+
+def test_invalid_arguments() -> None:
+    a = Variable(name="a")
+    with pytest.raises(ValueError):
+        order_by([], [])
+    with pytest.raises(ValueError):
+        order_by([], [a], desc=[True, False])
+    with pytest.raises(ValueError):
+        order_by([], a, limit=-1)
+    with pytest.raises(ValueError):
+        order_by([], a, run_size=0)
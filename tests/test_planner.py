@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from kinda_orm.expr import AndExpr, CallExpr, CastExpr, ConstExpr, EqualExpr, GreaterThanExpr, PyFunction, Variable
+from kinda_orm.planner import AccessPath, plan_scan
+from kinda_orm.storage import Table, write_table
+
+
+def _slow(value: int) -> bool:
+    return value % 2 == 0
+
+
+def _two(value: int) -> int:
+    return 2
+
+
+def test_call_conjunct_is_filtered_after_range(tmp_path) -> None:
+    write_table(tmp_path, {"x": list(range(1000)), "y": list(range(1000))}, chunk_rows=100)
+    x, y = Variable(name="x"), Variable(name="y")
+    slow = PyFunction(_slow)(y)
+    with Table(tmp_path) as table:
+        scan = plan_scan(table, AndExpr(GreaterThanExpr(x, ConstExpr(10)), slow))
+        assert [type(filter_.predicate) for filter_ in scan.filters] == [GreaterThanExpr, CallExpr]
+        table.create_index("x")
+        plan = plan_scan(table, AndExpr(EqualExpr(x, ConstExpr(500)), slow))
+        assert plan.access is AccessPath.index and plan.index.column == "x"
+        assert [type(filter_.predicate) for filter_ in plan.filters] == [CallExpr]
+        assert list(plan.execute()) == [{"x": 500, "y": 500}]
+
+
+def test_bitwise_and_with_non_bool_call_is_kept_whole(tmp_path) -> None:
+    write_table(tmp_path, {"x": list(range(10)), "y": list(range(10))})
+    x, y = Variable(name="x"), Variable(name="y")
+    # NOTE: `True & 2` is 0, so no row matches
+    predicate = AndExpr(EqualExpr(x, ConstExpr(5)), PyFunction(_two)(y))
+    with Table(tmp_path) as table:
+        table.create_index("x")
+        plan = plan_scan(table, predicate)
+        assert len(plan.filters) == 1
+        assert list(plan.execute()) == list(table.scan(predicate)) == []
+        cast = AndExpr(EqualExpr(x, ConstExpr(5)), CastExpr(PyFunction(_two)(y), bool))
+        plan = plan_scan(table, cast)
+        assert plan.access is AccessPath.index
+        assert list(plan.execute()) == list(table.scan(cast)) == [{"x": 5, "y": 5}]
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from kinda_orm.evaluation import evaluate
+from kinda_orm.expr import AddExpr, ConstExpr, EqualExpr, Variable
+from kinda_orm.plans import PlanCache, lift_constants, plan_key
+
+
+def test_none_constant_is_lifted() -> None:
+    cache = PlanCache()
+    x = Variable(name="x")
+    assert cache.evaluate(EqualExpr(x, ConstExpr(None)), {"x": None}) is True
+    assert cache.evaluate(EqualExpr(x, ConstExpr(1)), {"x": 1}) is True
+    assert cache.stats().hits == 1
+
+
+def test_shared_constant_is_one_parameter() -> None:
+    shared = ConstExpr(3)
+    key, params = plan_key(AddExpr(shared, shared))
+    assert params == [3]
+    assert key != plan_key(AddExpr(ConstExpr(3), ConstExpr(4)))[0]
+    assert lift_constants(AddExpr(shared, shared))[1] == params
+
+
+def test_shared_subtrees_are_keyed_once() -> None:
+    x = Variable(name="x")
+    expr = x + ConstExpr(1)
+    for _ in range(24):
+        expr = AddExpr(expr, expr)
+    key, params = plan_key(expr)
+    assert params == [1]
+    assert len(key) == 27
+    assert lift_constants(expr)[1] == params
+    cache = PlanCache()
+    assert cache.evaluate(expr, {"x": 1}) == 2 ** 25
+    assert cache.evaluate(expr, {"x": 2}) == 3 * 2 ** 24
+    assert cache.stats().hits == 1
+
+
+def test_plan_matches_evaluate() -> None:
+    cache = PlanCache()
+    x, y = Variable(name="x"), Variable(name="y")
+    for value in range(5):
+        expr = (x * ConstExpr(value) + y) < ConstExpr(10 + value)
+        scope = {"x": 3, "y": value}
+        assert cache.evaluate(expr, scope) == evaluate(expr, scope)
+    assert cache.stats().misses == 1
@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+from kinda_orm.statistics import collect_statistics
+
+
+def test_fraction_at_bucket_bounds() -> None:
+    stats = collect_statistics({"x": list(range(1000))}, buckets=10).columns["x"]
+    assert stats.fraction_between(999, None) > 0
+    assert abs(stats.fraction_between(999, None) - 0.001) < 0.001
+    assert stats.fraction_below(999, inclusive=True) == 1.0
+    assert abs(stats.fraction_below(stats.histogram.bounds[5]) - 0.5) < 0.01
+    assert stats.fraction_between(None, 0, high_inclusive=False) == 0.0
+
+
+def test_fraction_of_frequent_value() -> None:
+    stats = collect_statistics({"x": [0] * 500 + list(range(1, 501))}, buckets=10).columns["x"]
+    assert stats.fraction_below(0) == 0.0
+    assert abs(stats.fraction_below(0, inclusive=True) - 0.5) < 0.1
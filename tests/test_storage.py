@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import math
+
+from kinda_orm.expr import ConstExpr, GreaterThanExpr, NotEqualExpr, Variable
+from kinda_orm.planner import plan_scan
+from kinda_orm.storage import Table, write_table
+
+
+def test_not_equal_keeps_nan_rows(tmp_path) -> None:
+    write_table(tmp_path, {"x": [5.0, math.nan, 5.0, 5.0]}, chunk_rows=2)
+    predicate = NotEqualExpr(Variable(name="x"), ConstExpr(5.0))
+    with Table(tmp_path) as table:
+        column = table.column("x")
+        assert column.chunk_range(0) == (5.0, 5.0)
+        assert column.chunk_has_nan(0) and not column.chunk_has_nan(1)
+        assert [math.isnan(row["x"]) for row in table.scan(predicate)] == [True]
+        assert [math.isnan(row["x"]) for row in plan_scan(table, predicate).execute()] == [True]
+
+
+def test_close_during_scan(tmp_path) -> None:
+    write_table(tmp_path, {"x": list(range(100))}, chunk_rows=10)
+    predicate = GreaterThanExpr(Variable(name="x"), ConstExpr(5))
+    table = Table(tmp_path)
+    rows = table.scan(predicate)
+    assert next(rows) == {"x": 6}
+    table.close()
+    # closed table maps its columns again when scanned
+    assert len(list(table.scan(predicate))) == 94
+    rows.close()
+    table.close()
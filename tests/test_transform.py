@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from typing import Any
+
+from kinda_orm.canonical import structural_key
+from kinda_orm.expr import AddExpr, ConstExpr, Expr, MulExpr, Variable
+from kinda_orm.transform import Transformer, iter_postorder, map_children, transforms
+
+
+class _Doubler(Transformer):
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    @transforms(ConstExpr)
+    def _double(self, node: ConstExpr[Any]) -> Expr[Any]:
+        self.calls += 1
+        return ConstExpr(node.value * 2)
+
+
+class _Nothing(Transformer):
+    pass
+
+
+def test_unchanged_subtrees_are_shared() -> None:
+    x, y = Variable(name="x"), Variable(name="y")
+    untouched = x * y
+    expr = AddExpr(untouched, ConstExpr(1))
+    assert _Nothing().transform(expr) is expr
+    result = _Doubler().transform(expr)
+    assert result is not expr
+    assert result.left is untouched
+    assert result.right.value == 2
+    assert expr.right.value == 1
+
+
+def test_handlers_are_inherited_by_subclasses() -> None:
+    class Sub(_Doubler):
+        @transforms(MulExpr)
+        def _swap(self, node: MulExpr[Any, Any]) -> Expr[Any]:
+            return MulExpr(node.right, node.left)
+
+    result = Sub().transform(MulExpr(Variable(name="x"), ConstExpr(3)))
+    assert structural_key(result) == structural_key(MulExpr(ConstExpr(6), Variable(name="x")))
+
+
+def test_deep_tree() -> None:
+    expr: Expr[Any] = Variable(name="x")
+    for _ in range(20000):
+        expr = AddExpr(expr, ConstExpr(1))
+    result = _Doubler().transform(expr)
+    assert result.right.value == 2
+    assert sum(1 for _ in iter_postorder(result)) == 40001
+
+
+def test_shared_subtrees_are_transformed_once() -> None:
+    expr: Expr[Any] = AddExpr(Variable(name="x"), ConstExpr(1))
+    for _ in range(50):
+        expr = AddExpr(expr, expr)
+    doubler = _Doubler()
+    result = doubler.transform(expr)
+    assert doubler.calls == 1
+    assert result.left is result.right
+
+
+def test_iter_postorder() -> None:
+    x, one = Variable(name="x"), ConstExpr(1)
+    expr = AddExpr(MulExpr(x, one), x)
+    assert list(iter_postorder(expr)) == [x, one, expr.left, x, expr]
+    assert list(iter_postorder(expr, skip=lambda node: node is expr.left)) == [x, expr]
+
+
+def test_map_children() -> None:
+    x, y = Variable(name="x"), Variable(name="y")
+    expr = AddExpr(x, ConstExpr(1))
+    assert map_children(expr, lambda node: node) is expr
+    result = map_children(expr, lambda node: y if node is x else node)
+    assert result.left is y and result.right is expr.right